@@ -23,6 +23,8 @@ from typing import List, Tuple, Optional, Dict, Any
 import shutil
 import logging
 
+import prep_daemon
+
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
 # --------------------------------------------------------------------------------------
@@ -128,6 +130,17 @@ def _run_python_script(script_path: str, args: Optional[List[str]] = None, timeo
         logger.exception("_run_python_script: Exception running %s: %s", script_path, e)
         return False, f"Exception: {e}"
 
+def _run_prep_check(req: Dict[str, Any], script_path: str) -> Tuple[bool, str]:
+    """Ask prep_daemon (persistent MQTT client) first; run the prepare script if it is not up."""
+    resp = prep_daemon.request(req)
+    if resp is None:
+        logger.debug("_run_prep_check: prep_daemon unavailable, running %s", script_path)
+        return _run_python_script(script_path)
+    logger.debug("_run_prep_check: %s -> %s", req, resp)
+    if resp['ok']:
+        return True, f"Ready: {', '.join(resp['seen'])}"
+    return False, f"Timeout. Missing: {resp['missing']}"
+
 def _find_existing_script(candidates: List[str]) -> Optional[str]:
     for p in candidates:
         if os.path.exists(p):
@@ -266,12 +279,12 @@ def run_initialisation_steps(game_number: Optional[int], controller: Optional[st
         steps.append({'name': 'Joystick/Gesture', 'ok': True, 'message': 'Gesture selected'})
 
     # 2) Nodes prepare (ALL games)
-    ok_nodes, msg_nodes = _run_python_script(PREPARE_NODES_PATH)
+    ok_nodes, msg_nodes = _run_prep_check({'op': 'check_nodes'}, PREPARE_NODES_PATH)
     steps.append({'name': 'Nodes', 'ok': ok_nodes, 'message': msg_nodes or ''})
 
     # 3) Car prepare (Game 2 only)
     if game_number == 4:
-        ok_car, msg_car = _run_python_script(PREPARE_CAR_PATH)
+        ok_car, msg_car = _run_prep_check({'op': 'check_car'}, PREPARE_CAR_PATH)
         steps.append({'name': 'Car', 'ok': ok_car, 'message': msg_car or ''})
     else:
         steps.append({'name': 'Car', 'ok': True, 'message': 'Skipped (not required for this game)'})
@@ -0,0 +1,208 @@
+"""
+db.py
+Shared SQLite helpers for the Flask console apps and the CLI tools.
+
+- open_db(): sqlite3.connect() with WAL, synchronous=NORMAL, a 30 s busy timeout,
+  in-memory temp storage and a 2 MiB page cache.
+- get_writer() / get_reader(): for the CLI tools, 1 read-write + N read-only. One
+  shared autocommit writer per process; readers are per thread and opened
+  mode=ro, so a report can never take the write lock.
+- ConnectionPool: a bounded set of long-lived connections handed out per request,
+  so handlers do not reopen the database file (and its -wal/-shm) on every call.
+- Every pooled connection is opened once via open_db(), adds memory-mapped reads,
+  and can be used from any request thread.
+- ensure_schema(): creates the indexes the apps' lookups and upserts rely on (unless
+  the schema already has them), and the trigger-maintained PlayerTotals table the
+  leaderboard reads.
+"""
+
+import queue
+import sqlite3
+import threading
+from urllib.request import pathname2url
+
+DB_NAME = 'flycamp_framework.db'
+
+# (name, table, columns, sql): indexes the upserts/lookups rely on. Databases from
+# dbsetup.py already have equivalent UNIQUE constraints; there the index is not
+# created (or dropped, if an earlier run made one), since a second b-tree on the
+# same columns only slows every write.
+INDEXES = (
+    ("ux_playerbests", "PlayerBests", ("token_id", "game_number", "level_number"),
+     "CREATE UNIQUE INDEX IF NOT EXISTS ux_playerbests ON PlayerBests(token_id, game_number, level_number)"),
+    ("ix_pr_token", "PlayerRegistrations", ("token_id",),
+     "CREATE INDEX IF NOT EXISTS ix_pr_token ON PlayerRegistrations(token_id)"),
+)
+
+# PlayerTotals holds SUM(highest_score) per token. Triggers keep it in step with
+# every PlayerBests write (the game scripts write PlayerBests directly too).
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS PlayerTotals (token_id INTEGER PRIMARY KEY, total_score INTEGER NOT NULL DEFAULT 0)",
+    # The leaderboard GROUPs BY player name, so no index on total_score can serve it;
+    # drop the one earlier versions created rather than maintain it in every trigger.
+    "DROP INDEX IF EXISTS ix_totals",
+    """CREATE TRIGGER IF NOT EXISTS trg_pb_totals_ins AFTER INSERT ON PlayerBests BEGIN
+        INSERT INTO PlayerTotals (token_id, total_score) VALUES (NEW.token_id, NEW.highest_score)
+        ON CONFLICT(token_id) DO UPDATE SET total_score = total_score + excluded.total_score;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_pb_totals_upd AFTER UPDATE OF highest_score ON PlayerBests BEGIN
+        UPDATE PlayerTotals SET total_score = total_score - OLD.highest_score + NEW.highest_score
+        WHERE token_id = NEW.token_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_pb_totals_del AFTER DELETE ON PlayerBests BEGIN
+        UPDATE PlayerTotals SET total_score = total_score - OLD.highest_score
+        WHERE token_id = OLD.token_id;
+    END""",
+)
+
+
+def open_db(db_path, **connect_kwargs):
+    """sqlite3.connect() plus the PRAGMAs every entry point (apps and CLI tools) runs with."""
+    conn = sqlite3.connect(db_path, timeout=30, **connect_kwargs)
+    conn.execute("PRAGMA journal_mode=WAL")        # readers don't block the writer
+    conn.execute("PRAGMA synchronous=NORMAL")      # fsync at checkpoints, not every commit
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute("PRAGMA temp_store=MEMORY")       # sorts/GROUP BY temp b-trees stay in RAM
+    conn.execute("PRAGMA cache_size=-2000")        # 2 MiB page cache
+    return conn
+
+
+_writers = {}                 # db_path -> the process's read-write connection
+_writers_lock = threading.Lock()
+_readers = threading.local()  # .conns: db_path -> this thread's read-only connection
+
+
+def _is_open(conn):
+    try:
+        conn.in_transaction
+    except sqlite3.ProgrammingError:  # closed by a caller
+        return False
+    return True
+
+
+def get_writer(db_path=DB_NAME):
+    """The single read-write connection for db_path, opened on first use.
+    Autocommit (isolation_level=None): multi-statement writes issue their own
+    BEGIN IMMEDIATE ... COMMIT, and threads sharing it must not interleave them."""
+    with _writers_lock:
+        conn = _writers.get(db_path)
+        if conn is None or not _is_open(conn):
+            conn = _writers[db_path] = open_db(db_path, isolation_level=None, check_same_thread=False)
+        return conn
+
+
+def get_reader(db_path=DB_NAME):
+    """This thread's read-only connection for db_path, opened on first use."""
+    conns = _readers.__dict__.setdefault("conns", {})
+    conn = conns.get(db_path)
+    if conn is None or not _is_open(conn):
+        # mode=ro cannot switch journal_mode, so only the read-side PRAGMAs of open_db()
+        conn = sqlite3.connect(f"file:{pathname2url(db_path)}?mode=ro", uri=True, timeout=30)
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-2000")
+        conns[db_path] = conn
+    return conn
+
+
+class PooledConnection(sqlite3.Connection):
+    # Set by ConnectionPool so release() knows where the connection belongs.
+    pool = None
+
+
+class ConnectionPool:
+    """Hands out up to `size` connections to DB_PATH; extra borrowers wait for a free one."""
+
+    def __init__(self, db_path, size):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.Queue(maxsize=size)
+        self._lock = threading.Lock()
+        self._opened = 0
+
+    def _open(self):
+        conn = open_db(self.db_path, check_same_thread=False, factory=PooledConnection)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA mmap_size=268435456")     # read pages via a 256 MiB mapping
+        conn.pool = self
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        # Open lazily up to `size`; unused slots never cost a connection.
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        return self._idle.get()
+
+    def release(self, conn):
+        try:
+            conn.rollback()  # never hand out a connection with an open transaction
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+            return
+        self._idle.put(conn)
+
+
+def release(conn):
+    """Return a connection obtained from ConnectionPool.acquire() to its pool."""
+    if conn is not None:
+        conn.pool.release(conn)
+
+
+def has_unique_index(conn, table, columns, exclude=None):
+    """True if `table` has a unique index (other than `exclude`) on exactly `columns`, in any order."""
+    for _, name, unique, *_ in conn.execute(f"PRAGMA index_list({table})"):
+        if unique and name != exclude and \
+                {row[2] for row in conn.execute(f"PRAGMA index_info({name})")} == set(columns):
+            return True
+    return False
+
+
+def ensure_schema(pool):
+    """Add the INDEXES the schema lacks and run every SCHEMA statement once at
+    startup, then rebuild PlayerTotals from PlayerBests (covers rows written
+    before the triggers existed). Failures are logged, not fatal."""
+    try:
+        conn = pool.acquire()
+    except sqlite3.Error as e:
+        print(f"[ensure_schema] Could not open {pool.db_path}: {e}")
+        return
+    try:
+        statements = []
+        for name, table, columns, sql in INDEXES:
+            try:
+                covered = has_unique_index(conn, table, columns, exclude=name)
+            except sqlite3.Error as e:
+                print(f"[ensure_schema] Could not inspect {table} indexes: {e}")
+                continue
+            statements.append(f"DROP INDEX IF EXISTS {name}" if covered else sql)
+        for sql in statements + list(SCHEMA):
+            try:
+                with conn:
+                    conn.execute(sql)
+            except sqlite3.Error as e:
+                print(f"[ensure_schema] {e}: {sql}")
+        try:
+            with conn:
+                conn.execute("DELETE FROM PlayerTotals")
+                conn.execute("INSERT INTO PlayerTotals (token_id, total_score) "
+                             "SELECT token_id, SUM(highest_score) FROM PlayerBests GROUP BY token_id")
+        except sqlite3.Error as e:
+            print(f"[ensure_schema] Could not rebuild PlayerTotals: {e}")
+    finally:
+        pool.release(conn)
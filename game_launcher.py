@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# game_launcher.py - prewarmed parent process for the game scripts
+# Started once by the console app. Every line on stdin is the path of a game
+# script; each game is forked from this already-initialised interpreter
+# (tkinter + paho imported once here) instead of exec'ing a fresh python3.
+
+import os
+import runpy
+import signal
+import sys
+import traceback
+
+# Preload what every game imports anyway; forked children get it for free
+import tkinter  # noqa: F401
+try:
+    import paho.mqtt.client  # noqa: F401
+except ImportError:
+    pass
+
+
+def run_game(script):
+    """Child side of the fork: behave like `python3 <script>` and never return."""
+    code = 0
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)  # games wait on their own helpers
+        # stdin is the launcher's command pipe, not the game's
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        sys.argv = [script]
+        sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def main():
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # finished games are reaped automatically
+    for line in sys.stdin:
+        script = line.strip()
+        if not script:
+            continue
+        try:
+            pid = os.fork()
+        except OSError as e:
+            print(f"[game_launcher] fork failed for {script}: {e}", file=sys.stderr)
+            continue
+        if pid == 0:
+            run_game(script)
+        print(f"[game_launcher] started {script} (pid {pid})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
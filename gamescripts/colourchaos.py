@@ -26,6 +26,8 @@ import json
 import subprocess
 import threading
 
+from done_flag import write_done_flag
+
 # =================================================================
 # === CONFIGURATION (UPDATED) ===
 # =================================================================
@@ -500,4 +502,4 @@ if __name__ == "__main__":
         print("Game window closed.")
         stop_gesture_control()
         stop_joystick_control()
-        with open("/home/devesh/game_done.flag","w") as f: f.write("done")
+        write_done_flag()
@@ -0,0 +1,19 @@
+# done_flag.py - shared "game finished" flag writer for the game scripts
+# The console watches FLAG_FILE (inotify CLOSE_WRITE/MOVED_TO, or polling), so the
+# flag is written to a temp file, fsync'd and renamed into place: a watcher never
+# sees a half-written flag.
+
+import os
+
+FLAG_FILE = "/home/devesh/game_done.flag"
+
+
+def write_done_flag(path=FLAG_FILE, content=b"done"):
+    tmp = path + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, content)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
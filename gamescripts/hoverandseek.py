@@ -30,6 +30,8 @@ from zoneinfo import ZoneInfo
 
 import paho.mqtt.client as mqtt
 
+from done_flag import write_done_flag
+
 # New imports for launching gesturecontrol as an external process
 import subprocess
 import threading
@@ -39,6 +41,9 @@ import logging
 import threading
 import subprocess
 import shutil
+import sys
+import runpy
+import multiprocessing
 
 
 # =================================================================
@@ -98,6 +103,9 @@ PREPARE_TOPIC = "game/prepare"
 # Controller executables
 JOYSTICK_CONTROL_PATH = os.environ.get("JOYSTICK_CONTROL_PATH", "/home/devesh/Joystick_Control/Joystick_Control.py")
 
+# LOW_POWER=1 skips the countdown zoom animation (useful on slower boards)
+LOW_POWER = os.environ.get("LOW_POWER") == "1"
+
 # Gameplay
 GAME_DURATION = 15  # seconds
 SCORE_DISPLAY_DURATION = 10  # seconds after game ends (UI) — extended to give time for leaderboard
@@ -150,6 +158,10 @@ gesture_proc = None            # subprocess.Popen instance for gesturecontrol
 gesture_thread = None          # thread reading gestureproc stdout
 gesture_stop_event = threading.Event()
 
+# Canvas item ids for items updated during play (avoids tag lookups per update)
+score_text_id = None
+timer_arc_id = None
+
 # =================================================================
 # === UI ===
 # =================================================================
@@ -314,22 +326,20 @@ def draw_card(x1, y1, x2, y2):
 
 
 def draw_circle_progress(x, y, r, percent):
-    # very lightweight progress ring
+    # very lightweight progress ring; returns the arc id so ticks only change its extent
     canvas.create_oval(x - r, y - r, x + r, y + r, outline=ACCENT_YELLOW, width=6, tags="timer")
-    angle = percent * 360
-    if angle > 0:
-        canvas.create_arc(x - r, y - r, x + r, y + r, start=90, extent=-angle,
-                          style="arc", outline=TEXT_LIGHT, width=8, tags="timer")
+    return canvas.create_arc(x - r, y - r, x + r, y + r, start=90, extent=-percent * 360,
+                             style="arc", outline=TEXT_LIGHT, width=8, tags="timer")
 
 
 def draw_text_center(x, y, text, size=48, color=ACCENT_YELLOW, weight="bold", tag=None):
-    canvas.create_text(x, y, text=text, fill=color, font=(FONT_FAMILY, size, weight), tags=tag)
+    return canvas.create_text(x, y, text=text, fill=color, font=(FONT_FAMILY, size, weight), tags=tag)
 
 
 def animate_score_pop():
     # keep this subtle to reduce CPU; one quick size toggle
-    canvas.itemconfig("score_text", font=(FONT_FAMILY, 88, "bold"), fill=ACCENT_YELLOW)
-    root.after(120, lambda: canvas.itemconfig("score_text", font=(FONT_FAMILY, 76, "bold"), fill=TEXT_LIGHT))
+    canvas.itemconfig(score_text_id, font=(FONT_FAMILY, 88, "bold"), fill=ACCENT_YELLOW)
+    root.after(120, lambda: canvas.itemconfig(score_text_id, font=(FONT_FAMILY, 76, "bold"), fill=TEXT_LIGHT))
 
 
 # =================================================================
@@ -351,7 +361,7 @@ def _on_gesture_hit():
         update_main_screen()
 
     hit_count += 1
-    canvas.itemconfig("score_text", text=str(hit_count))
+    canvas.itemconfig(score_text_id, text=str(hit_count))
     animate_score_pop()
     trigger_next_node()
     play_sound("target hit.wav")
@@ -479,19 +489,32 @@ def send_esp32_mode(mode: int, device: str = "/dev/ttyACM1"):
         print(f"ESP32S3 mode send failed on {device}: {e}")
 
 
+def _run_joystick_helper(path):
+    # Runs in the forked child: execute the helper script as if started with python3.
+    sys.argv = [path]
+    runpy.run_path(path, run_name="__main__")
+
+
 def start_joystick_control():
+    """
+    Python helpers are forked from this process (imports already loaded are shared),
+    which avoids a cold interpreter start per game. Other executables are spawned.
+    """
     global joy_proc
     if joy_proc is not None:
         return
     # ESP32S3 mode signaling disabled (no 0x01 sent)
     path = JOYSTICK_CONTROL_PATH
     try:
-        if path.endswith('.py'):
-            cmd = ['python3', path]
+        if path.endswith('.py') and os.path.exists(path):
+            print(f"Starting joystick control (forked): {path}")
+            ctx = multiprocessing.get_context("fork")
+            joy_proc = ctx.Process(target=_run_joystick_helper, args=(path,), daemon=True)
+            joy_proc.start()
         else:
-            cmd = [path]
-        print(f"Starting joystick control: {' '.join(cmd)}")
-        joy_proc = subprocess.Popen(cmd)
+            cmd = ['python3', path] if path.endswith('.py') else [path]
+            print(f"Starting joystick control: {' '.join(cmd)}")
+            joy_proc = subprocess.Popen(cmd)
     except Exception as e:
         print(f"Failed to start joystick control ({path}): {e}")
         joy_proc = None
@@ -502,10 +525,15 @@ def stop_joystick_control():
     try:
         if joy_proc:
             joy_proc.terminate()
-            try:
-                joy_proc.wait(timeout=1.0)
-            except Exception:
-                joy_proc.kill()
+            if isinstance(joy_proc, subprocess.Popen):
+                try:
+                    joy_proc.wait(timeout=1.0)
+                except Exception:
+                    joy_proc.kill()
+            else:
+                joy_proc.join(1.0)
+                if joy_proc.is_alive():
+                    joy_proc.kill()
     except Exception:
         pass
     finally:
@@ -542,10 +570,8 @@ def update_main_screen():
     elapsed = time.time() - start_time
     percent = min(elapsed / GAME_DURATION, 1.0)
 
-    canvas.delete("timer")
-    cx, cy = get_center()
-    draw_circle_progress(cx, cy - 20, 120, percent)
-    canvas.itemconfig("score_text", text=str(hit_count))
+    canvas.itemconfig(timer_arc_id, extent=-percent * 360)
+    canvas.itemconfig(score_text_id, text=str(hit_count))
 
     if elapsed >= GAME_DURATION:
         end_game()
@@ -554,6 +580,7 @@ def update_main_screen():
 
 
 def show_main_screen():
+    global score_text_id, timer_arc_id
     clear_screen()
     cx, cy = get_center()
 
@@ -562,8 +589,8 @@ def show_main_screen():
 
     draw_text_center(cx, cy - 270, "Hover and Seek", 44, ACCENT_YELLOW, weight="bold", tag="title")
 
-    draw_circle_progress(cx, cy - 20, 120, 0)
-    draw_text_center(cx, cy - 40, str(hit_count), 76, TEXT_LIGHT, tag="score_text")
+    timer_arc_id = draw_circle_progress(cx, cy - 20, 120, 0)
+    score_text_id = draw_text_center(cx, cy - 40, str(hit_count), 76, TEXT_LIGHT, tag="score_text")
     draw_text_center(cx, cy + 36, "HITS", 24, TEXT_LIGHT, weight="normal", tag="score_label")
 
     # Exit button (top-right)
@@ -593,20 +620,27 @@ def show_startup_countdown(seconds=3):
     countdown_text = canvas.create_text(cx, cy + 220, text="", fill=TEXT_LIGHT,
                                         font=(FONT_FAMILY, 1, "bold"), tags="countdown_text")
 
-    def animate_zoom_in(tag, max_size, steps, current_step=1):
-        if current_step <= steps:
-            size = int(max_size * (current_step / steps))
-            canvas.itemconfig(tag, font=(FONT_FAMILY, size, "bold"))
-            root.after(12, lambda: animate_zoom_in(tag, max_size, steps, current_step + 1))
+    def animate_zoom_in(item, max_size, steps):
+        if LOW_POWER:
+            canvas.itemconfig(item, font=(FONT_FAMILY, max_size, "bold"))
+            return
+        sizes = [int(max_size * (i / steps)) for i in range(1, steps + 1)]
+
+        def step(i):
+            if i < steps:
+                canvas.itemconfig(item, font=(FONT_FAMILY, sizes[i], "bold"))
+                root.after(12, step, i + 1)
+
+        step(0)
 
     def update_count(count):
         if count > 0:
             canvas.itemconfig(countdown_text, text=str(count), font=(FONT_FAMILY, 1, "bold"))
-            animate_zoom_in("countdown_text", 140, 18)
+            animate_zoom_in(countdown_text, 140, 18)
             root.after(1000, lambda: update_count(count - 1))
         else:
             canvas.itemconfig(countdown_text, text="GO!", font=(FONT_FAMILY, 1, "bold"))
-            animate_zoom_in("countdown_text", 160, 14)
+            animate_zoom_in(countdown_text, 160, 14)
             root.after(600, start_game)
 
     canvas.itemconfig(countdown_text, text="Get Ready...", font=(FONT_FAMILY, 40, "normal"))
@@ -664,8 +698,7 @@ def end_game():
 
     # >>> Signal completion NOW so the web UI can switch to leaderboard while we display score
     try:
-        with open(FLAG_FILE, "w") as f:
-            f.write("done")
+        write_done_flag(FLAG_FILE)  # atomic: a watcher never sees a half-written flag
         print("Flag written (post-DB).")
     except Exception as e:
         print(f"Could not write flag file: {e}")
@@ -685,8 +718,7 @@ def finish_and_exit():
 # === MQTT ===
 # =================================================================
 def on_connect(client, userdata, flags, rc):
-    for topic in HIT_TOPICS:
-        client.subscribe(topic)
+    client.subscribe([(topic, 0) for topic in HIT_TOPICS])
     print(f"Subscribed to hit topics; rc={rc}")
 
 
@@ -706,7 +738,7 @@ def on_message(client, userdata, msg):
         update_main_screen()
 
     hit_count += 1
-    canvas.itemconfig("score_text", text=str(hit_count))
+    canvas.itemconfig(score_text_id, text=str(hit_count))
     animate_score_pop()
     trigger_next_node()
     play_sound("target hit.wav")
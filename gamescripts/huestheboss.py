@@ -22,6 +22,10 @@ import os
 import json
 import subprocess
 import threading
+import importlib.util
+import multiprocessing
+
+from done_flag import write_done_flag
 
 # =================================================================
 # === CONFIGURATION (CORRECTED) ===
@@ -39,7 +43,9 @@ COLOR_NODES = ["node2", "node3", "node4", "node5"]
 ALL_NODES = ["node1"] + COLOR_NODES
 
 HIT_TOPICS = [f"game/hit/{nid}" for nid in COLOR_NODES]
+HIT_TOPIC_TO_NODE = {t: t.rsplit("/", 1)[-1] for t in HIT_TOPICS}
 TRIGGER_TOPICS = {nid: f"game/trigger/{nid}" for nid in ALL_NODES}
+TRIGGER_TOPIC_LIST = [TRIGGER_TOPICS[nid] for nid in ALL_NODES]
 RESET_TOPIC = "game/reset"
 COLOR_TOPIC = "game/color"
 PREPARE_TOPIC = "game/prepare"
@@ -58,13 +64,15 @@ META_PATH = "/home/devesh/game_meta.json"
 # =================================================================
 controller_type = None
 hit_count = 0
-start_time = None
+start_time = None   # wall clock (unix) when the timer started; stored in GamePlays
+timer_start = None  # time.monotonic() at the same moment; drives the timer ring
 game_started = False
 timer_running = False
 current_color_index = 0
 color_sequence = []
 color_to_node = {}
 target_color = None
+expected_node = None  # node for target_color, cached when the round changes
 
 score_id = None
 timer_arc_id = None
@@ -81,6 +89,7 @@ begin_ts_unix = None
 # === RC Car Control State ===
 rc_proc = None
 rc_stop_event = threading.Event()
+rc_module = None  # rc_car_control.py imported once; its main() is forked per game
 
 # =================================================================
 # === CONTROLLER HELPERS ===
@@ -107,6 +116,9 @@ canvas.pack(fill="both", expand=True)
 exit_button = None
 
 client = mqtt.Client("hues_detected_ui_v2")
+# All game traffic is QoS 0; a wider in-flight window keeps back-to-back publishes from queueing
+client.max_inflight_messages_set(20)
+client.max_queued_messages_set(0)  # 0 = unbounded queue
 
 def get_center():
     root.update_idletasks()
@@ -152,14 +164,16 @@ def generate_color_sequence():
     print("Color to node mapping:", color_to_node)
 
 def trigger_next_node():
-    global target_color
+    global target_color, expected_node
     if game_started and current_color_index < len(color_sequence):
         target_color = color_sequence[current_color_index]
+        expected_node = color_to_node.get(target_color)
         update_ui_elements()
         print(f"Triggering round {current_color_index + 1}: {target_color}")
-        client.publish(COLOR_TOPIC, target_color)
-        for node_id in ALL_NODES:
-            client.publish(TRIGGER_TOPICS[node_id], "start")
+        # One state transition = one colour publish + the node triggers, back to back, QoS 0
+        client.publish(COLOR_TOPIC, target_color, qos=0, retain=False)
+        for topic in TRIGGER_TOPIC_LIST:
+            client.publish(topic, "start", qos=0)
 
 def update_ui_elements():
     cx, cy = get_center()
@@ -168,8 +182,8 @@ def update_ui_elements():
     draw_target_color()
 
 def update_timer_ring():
-    if not game_started or not timer_running or start_time is None: return
-    elapsed = time.time() - start_time
+    if not game_started or not timer_running or timer_start is None: return
+    elapsed = time.monotonic() - timer_start
     percent = min(elapsed / GAME_DURATION, 1)
     cx, cy = get_center()
     radius = 180
@@ -289,14 +303,15 @@ def submit_score(score):
 # === GESTURECONTROL PROCESS INTEGRATION ===
 # =================================================================
 def _on_gesture_hit():
-    global hit_count, start_time, timer_running, begin_ts_unix
+    global hit_count, start_time, timer_start, timer_running, begin_ts_unix
     if not game_started:
         return
 
     if not timer_running:
         start_time = time.time()
+        timer_start = time.monotonic()
         timer_running = True
-        begin_ts_unix = int(time.time())
+        begin_ts_unix = int(start_time)
         update_timer_ring()
 
     # treat gesture hit like an MQTT 'hit'
@@ -397,17 +412,8 @@ def stop_gesture_control():
 # =================================================================
 # === RC CAR CONTROL PROCESS INTEGRATION ===
 # =================================================================
-def start_rc_car_control():
-    """
-    Start the RC car control process. RC_CAR_CONTROL_PATH can be:
-      - an executable file (then it will be run directly), or
-      - a Python script (ending with .py or readable) - will be run with python3.
-    The function stores the subprocess in rc_proc for later shutdown.
-    """
-    global rc_proc, rc_stop_event
-    if rc_proc is not None:
-        return
-
+def _resolve_rc_car_control():
+    """Pick the RC controller path and its launch command once, at import."""
     path = RC_CAR_CONTROL_PATH
     candidates = [path]
     if not path.endswith(".py"):
@@ -423,19 +429,62 @@ def start_rc_car_control():
     if chosen is None:
         chosen = path  # fall back to what user configured; it may be in PATH
 
+    if chosen.endswith(".py") or not os.access(chosen, os.X_OK):
+        cmd = ["python3", chosen]
+    else:
+        cmd = [chosen]
+    return chosen, cmd
+
+_RC_CHOSEN_PATH, _RC_CMD = _resolve_rc_car_control()
+
+def preload_rc_car_control():
+    """
+    Import the RC car script (if it is a Python file) ahead of the game so that
+    start_rc_car_control() only has to fork, not boot a new interpreter.
+    """
+    global rc_module
+    if rc_module is not None or not _RC_CHOSEN_PATH.endswith(".py"):
+        return rc_module
     try:
-        rc_stop_event.clear()
-        if chosen.endswith(".py") or not os.access(chosen, os.X_OK):
-            cmd = ["python3", chosen]
-        else:
-            cmd = [chosen]
+        spec = importlib.util.spec_from_file_location("rc_car_control", _RC_CHOSEN_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if callable(getattr(module, "main", None)):
+            rc_module = module
+    except Exception as e:
+        print(f"Could not preload RC car control ({_RC_CHOSEN_PATH}): {e}")
+    return rc_module
 
-        print(f"Starting RC car control: {' '.join(cmd)}")
-        # Start without capturing stdout/stderr to avoid blocking unless you want logs.
-        rc_proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, bufsize=1)
-        # Optionally, you could spawn a reader thread to log rc_proc stdout/stderr similar to gesture.
+def start_rc_car_control():
+    """
+    Start the RC car control process. RC_CAR_CONTROL_PATH can be:
+      - an executable file (then it will be run directly), or
+      - a Python script (ending with .py or readable) - will be run with python3.
+    The function stores the process in rc_proc for later shutdown.
+    A preloaded Python script is run by forking into its main(); anything else is spawned.
+    """
+    global rc_proc, rc_stop_event
+    if rc_proc is not None:
+        return
+
+    if preload_rc_car_control() is not None:
+        try:
+            rc_stop_event.clear()
+            print(f"Starting RC car control (forked): {_RC_CHOSEN_PATH}")
+            rc_proc = multiprocessing.get_context("fork").Process(target=rc_module.main, daemon=True)
+            rc_proc.start()
+            return
+        except Exception as e:
+            print(f"Failed to fork RC car control, spawning instead: {e}")
+            rc_proc = None
+
+    try:
+        rc_stop_event.clear()
+        print(f"Starting RC car control: {' '.join(_RC_CMD)}")
+        # Output is discarded: nothing reads it during the game, and a full pipe would stall the child.
+        rc_proc = subprocess.Popen(_RC_CMD, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     except Exception as e:
-        print(f"Failed to start RC car control ({chosen}): {e}")
+        print(f"Failed to start RC car control ({_RC_CHOSEN_PATH}): {e}")
         rc_proc = None
         rc_stop_event.clear()
 
@@ -446,30 +495,28 @@ def stop_rc_car_control():
     global rc_proc, rc_stop_event
     try:
         rc_stop_event.set()
-        if rc_proc:
+        if isinstance(rc_proc, multiprocessing.process.BaseProcess):
+            rc_proc.terminate()
+            rc_proc.join(1.0)
+            if rc_proc.is_alive():
+                rc_proc.kill()
+        elif rc_proc:
+            # rc_proc shares our process group, so signal it directly (no killpg)
             try:
                 rc_proc.terminate()
             except Exception:
                 pass
-            try:
-                rc_proc.wait(timeout=1.0)
-            except Exception:
+            deadline = time.monotonic() + 1.0
+            while time.monotonic() < deadline:
+                if rc_proc.poll() is not None:
+                    break
+                time.sleep(0.05)
+            else:
                 try:
                     rc_proc.kill()
+                    rc_proc.wait(timeout=1.0)
                 except Exception:
                     pass
-            # drain remaining output if any
-            try:
-                if rc_proc.stdout:
-                    out = rc_proc.stdout.read()
-                    if out:
-                        print(f"[rc_car_control:stdout] {out.strip()}")
-                if rc_proc.stderr:
-                    err = rc_proc.stderr.read()
-                    if err:
-                        print(f"[rc_car_control:stderr] {err.strip()}")
-            except Exception:
-                pass
     except Exception as e:
         print(f"Error stopping RC car control: {e}")
     finally:
@@ -499,7 +546,7 @@ def end_game():
         stop_joystick_control()
     except Exception:
         pass
-    client.publish(COLOR_TOPIC, "none")
+    client.publish(COLOR_TOPIC, "none", qos=0, retain=False)
     submit_score(hit_count)
     show_score_screen(hit_count)
 
@@ -515,26 +562,27 @@ def show_score_screen(score):
 # === MQTT ===
 # =================================================================
 def on_connect(client, userdata, flags, rc):
-    for topic in HIT_TOPICS: client.subscribe(topic)
+    client.subscribe([(topic, 0) for topic in HIT_TOPICS])
     print(f"Subscribed to {len(HIT_TOPICS)} hit topics.")
 
 def on_message(client, userdata, msg):
-    global hit_count, start_time, timer_running, current_color_index, target_color
-    topic = msg.topic
-    payload = msg.payload.decode().strip().lower()
-    if not game_started or target_color is None: return
-    node_id = topic.split("/")[-1]
-    expected_node = color_to_node.get(target_color)
-    if payload == "hit" and node_id == expected_node:
+    global hit_count, start_time, timer_start, timer_running, current_color_index, target_color, expected_node
+    node_id = HIT_TOPIC_TO_NODE.get(msg.topic)
+    if node_id is None or not game_started or target_color is None: return
+    payload = msg.payload
+    # Nodes send exactly b"hit"; the strip/lower fallback keeps older firmware working
+    is_hit = payload == b"hit" or payload.strip().lower() == b"hit"
+    if is_hit and node_id == expected_node:
         print(f"✅ Correct hit on {target_color} ({node_id})!")
-        target_color = None
+        target_color = expected_node = None
         if not timer_running:
             start_time = time.time()
+            timer_start = time.monotonic()
             timer_running = True
             update_timer_ring()
         hit_count += 1
         current_color_index += 1
-        update_ui_elements()
+        # trigger_next_node() redraws the score/target itself
         if current_color_index < len(color_sequence): trigger_next_node()
         else: end_game()
 
@@ -550,8 +598,9 @@ def setup_mqtt():
 # =================================================================
 if __name__ == "__main__":
     setup_mqtt()
+    preload_rc_car_control()
     time.sleep(1)
-    client.publish(PREPARE_TOPIC, "huestheboss", retain=False)
+    client.publish(PREPARE_TOPIC, "huestheboss", qos=0, retain=False)
 
     # Read controller selection from meta if available
     try:
@@ -572,4 +621,4 @@ if __name__ == "__main__":
         print("Game window closed.")
         stop_gesture_control()  # Cleanup gesture control at exit
         stop_rc_car_control()   # Cleanup RC car control at exit
-        with open(FLAG_FILE, "w") as f: f.write("done")
+        write_done_flag(FLAG_FILE)
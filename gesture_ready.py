@@ -4,6 +4,8 @@ import time
 import pyrealsense2 as rs
 import numpy as np
 import math
+import queue
+import threading
 
 import cflib.crtp
 from cflib.crazyflie import Crazyflie
@@ -18,20 +20,27 @@ DEFAULT_HEIGHT = 0.5  # meters
 FENCE_LIMIT = 1
 SCALE = 0.1
 PIXELS_PER_CM = 37.0
+GOTO_MIN_INTERVAL = 0.1  # seconds between hlc.go_to commands (radio link budget)
+GOTO_DEADBAND = 0.02  # metres; smaller target changes are not sent
+DETECT_SIZE = (320, 240)  # hand detection runs on a downscaled copy; landmarks are normalized
+DISPLAY_EVERY = 3  # live window refresh: every Nth processed frame (~10 Hz at 30 FPS)
 
 # ------------------ RealSense Init ------------------
 pipeline = rs.pipeline()
 config = rs.config()
-config.enable_stream(rs.stream.color, 640, 480, rs.format.bgr8, 30)
+# RGB straight from the camera (what MediaPipe wants); converted to BGR only for display
+config.enable_stream(rs.stream.color, 640, 480, rs.format.rgb8, 30)
 pipeline.start(config)
 
 # ------------------ MediaPipe Init ------------------
 mp_hands = mp.solutions.hands
+# model_complexity=0 is the lite landmark model; accurate enough for a palm centroid
 hands = mp_hands.Hands(
     static_image_mode=False,
     max_num_hands=1,
+    model_complexity=0,
     min_detection_confidence=0.7,
-    min_tracking_confidence=0.7
+    min_tracking_confidence=0.5
 )
 mp_draw = mp.solutions.drawing_utils
 
@@ -39,6 +48,12 @@ CAMERA_ORIENTATION = 'landscape'
 origin_x, origin_y = None, None
 current_x, current_y = 0.0, 0.0
 
+# Reused landmark buffer (21 x/y pairs) and palm landmark rows
+_lm_buf = np.empty((21, 2), dtype=np.float32)
+_PALM_IDX = np.array([0, 5, 9, 13, 17])
+# Tip, PIP and MCP rows for thumb, index, middle, ring, pinky
+_FINGER_IDX = np.array([4, 8, 12, 16, 20, 3, 7, 11, 15, 19, 2, 5, 9, 13, 17])
+
 # ----------- Battery voltage monitor ------------
 battery_voltage = None
 def battery_log_callback(timestamp, data, logconf):
@@ -54,33 +69,83 @@ def adjust_coordinates(cx, cy, w, h):
     else:
         return cx, cy
 
+def latest_frames():
+    # Drain whatever the camera has queued and keep only the newest frameset,
+    # so a slow iteration never leaves us processing stale frames.
+    frames = None
+    while True:
+        f = pipeline.poll_for_frames()
+        if not f:
+            break
+        frames = f
+    if frames is None:
+        try:
+            frames = pipeline.wait_for_frames(100)
+        except RuntimeError:
+            return None
+    return frames
+
+def load_landmarks(hand_landmarks):
+    for i, lm in enumerate(hand_landmarks.landmark):
+        _lm_buf[i, 0] = lm.x
+        _lm_buf[i, 1] = lm.y
+    return _lm_buf
+
+# Overlay text is rasterized once per distinct string and then copied onto frames
+_txt_cache = {}
+_TXT_PAD = 2
+
+def _text_tile(key, text, scale, color, thickness=2):
+    cached = _txt_cache.get(key)
+    if cached is not None and cached[0] == text:
+        return cached[1], cached[2], cached[3]
+    (tw, th), base = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+    tile = np.zeros((th + base + 2 * _TXT_PAD, tw + 2 * _TXT_PAD, 3), dtype=np.uint8)
+    cv2.putText(tile, text, (_TXT_PAD, th + _TXT_PAD), cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+    mask = tile.any(axis=2, keepdims=True)
+    _txt_cache[key] = (text, tile, mask, th)
+    return tile, mask, th
+
+def draw_cached_text(img, key, text, org, scale, color):
+    # Same placement as cv2.putText(img, text, org, ...): org is the baseline start
+    tile, mask, th = _text_tile(key, text, scale, color)
+    x0, y0 = org[0] - _TXT_PAD, org[1] - th - _TXT_PAD
+    y1, x1 = min(y0 + tile.shape[0], img.shape[0]), min(x0 + tile.shape[1], img.shape[1])
+    np.copyto(img[y0:y1, x0:x1], tile[:y1 - y0, :x1 - x0], where=mask[:y1 - y0, :x1 - x0])
+
+def mirror_landmarks(hand_landmarks):
+    # Frames are processed unmirrored; flip landmark x only for drawing on the mirrored view
+    for lm in hand_landmarks.landmark:
+        lm.x = 1.0 - lm.x
+
 def hand_tracking_preview():
     global origin_x, origin_y
     print("👉 Detecting hand continuously for 3 seconds to take off. Press 'q' to quit.")
     hand_detected_start = None
     while True:
-        frames = pipeline.wait_for_frames()
+        frames = latest_frames()
+        if frames is None:
+            continue
         color_frame = frames.get_color_frame()
         if not color_frame:
             continue
         frame = np.asanyarray(color_frame.get_data())
-        frame = cv2.flip(frame, 1)
         h, w, _ = frame.shape
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = hands.process(rgb)
+        result = hands.process(cv2.resize(frame, DETECT_SIZE, interpolation=cv2.INTER_AREA))
+        # Mirrored BGR copy for display only; detection works on the camera frame as-is
+        frame = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_RGB2BGR)
         hand_present = False
         if result.multi_hand_landmarks:
             hand_present = True
             for hand_landmarks in result.multi_hand_landmarks:
-                palm_indices = [0, 5, 9, 13, 17]
-                palm_x = sum(hand_landmarks.landmark[i].x for i in palm_indices) / len(palm_indices)
-                palm_y = sum(hand_landmarks.landmark[i].y for i in palm_indices) / len(palm_indices)
-                cx_raw = int(palm_x * w)
+                lm = load_landmarks(hand_landmarks)
+                palm_x, palm_y = lm[_PALM_IDX].mean(axis=0)
+                cx_raw = w - int(palm_x * w)
                 cy_raw = int(palm_y * h)
-                cx, cy = adjust_coordinates(cx_raw, cy_raw, w, h)
                 cv2.circle(frame, (cx_raw, cy_raw), 10, (0, 255, 0), -1)
+                mirror_landmarks(hand_landmarks)
                 mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-        current_time = time.time()
+        current_time = time.monotonic()
         if hand_present:
             if hand_detected_start is None:
                 hand_detected_start = current_time
@@ -98,113 +163,153 @@ def hand_tracking_preview():
         if cv2.waitKey(1) & 0xFF == ord('q'):
             return False
 
-def is_finger_extended(landmarks, tip, pip, mcp):
-    wrist = landmarks.landmark[0]
-    tip_dist = math.hypot(landmarks.landmark[tip].x - wrist.x, landmarks.landmark[tip].y - wrist.y)
-    pip_dist = math.hypot(landmarks.landmark[pip].x - wrist.x, landmarks.landmark[pip].y - wrist.y)
-    mcp_dist = math.hypot(landmarks.landmark[mcp].x - wrist.x, landmarks.landmark[mcp].y - wrist.y)
-    return tip_dist > pip_dist and pip_dist > mcp_dist
-
-def angle_between_three_points(a, b, c):
-    ab = (a.x - b.x, a.y - b.y)
-    cb = (c.x - b.x, c.y - b.y)
-    dot = ab[0] * cb[0] + ab[1] * cb[1]
-    norm_ab = math.hypot(*ab)
-    norm_cb = math.hypot(*cb)
-    angle = math.acos(dot / (norm_ab * norm_cb + 1e-7))
-    return math.degrees(angle)
-
-def is_l_gesture(hand_landmarks):
-    thumb_extended = is_finger_extended(hand_landmarks, 4, 3, 2)
-    index_extended = is_finger_extended(hand_landmarks, 8, 7, 5)
-    middle_extended = is_finger_extended(hand_landmarks, 12, 11, 9)
-    ring_extended = is_finger_extended(hand_landmarks, 16, 15, 13)
-    pinky_extended = is_finger_extended(hand_landmarks, 20, 19, 17)
+def fingers_extended(lm):
+    # Extended = tip farther from the wrist than the pip, pip farther than the mcp;
+    # squared distances (ordering only, no sqrt), all five fingers at once
+    d2 = ((lm[_FINGER_IDX] - lm[0]) ** 2).sum(axis=1).reshape(3, 5)
+    return (d2[0] > d2[1]) & (d2[1] > d2[2])
+
+def cos_angle_between_three_points(a, b, c):
+    # Cosine of the angle at b; callers compare it directly instead of taking acos
+    ab = a - b
+    cb = c - b
+    return float(ab @ cb) / math.sqrt(float(ab @ ab) * float(cb @ cb) + 1e-14)
+
+def is_l_gesture(lm):
+    thumb_extended, index_extended, middle_extended, ring_extended, pinky_extended = fingers_extended(lm)
     if thumb_extended and index_extended and not middle_extended and not ring_extended and not pinky_extended:
-        wrist = hand_landmarks.landmark[0]
-        thumb_tip = hand_landmarks.landmark[4]
-        index_tip = hand_landmarks.landmark[8]
-        angle = angle_between_three_points(thumb_tip, wrist, index_tip)
-        if 60 < angle < 120:
+        # 60 < angle < 120 degrees  <=>  cos(120) < cos(angle) < cos(60)
+        cos_theta = cos_angle_between_three_points(lm[4], lm[0], lm[8])
+        if -0.5 < cos_theta < 0.5:
             return True
     return False
 
+def _put_latest(q, item):
+    # 1-slot queue: replace any unconsumed item so consumers always see the newest
+    try:
+        q.put_nowait(item)
+    except queue.Full:
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            pass
+
+def _detection_worker(q_in, q_out, stop_event):
+    while not stop_event.is_set():
+        try:
+            frame = q_in.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        result = hands.process(cv2.resize(frame, DETECT_SIZE, interpolation=cv2.INTER_AREA))
+        _put_latest(q_out, (frame, result))
+
 def hand_tracking_control(hlc, flight_time=60):
     global origin_x, origin_y, current_x, current_y, battery_voltage
-    takeoff_time = time.time()
+    takeoff_time = time.monotonic()
     flight_timer_enabled = True
-    while True:
-        frames = pipeline.wait_for_frames()
-        color_frame = frames.get_color_frame()
-        if not color_frame:
-            continue
-        frame = np.asanyarray(color_frame.get_data())
-        frame = cv2.flip(frame, 1)
-        h, w, _ = frame.shape
+    frame_idx = 0
+    last_cmd_t = 0.0
+
+    # Hand detection runs on a worker thread; capture and drone commands stay here
+    q_in, q_out = queue.Queue(maxsize=1), queue.Queue(maxsize=1)
+    stop_event = threading.Event()
+    worker = threading.Thread(target=_detection_worker, args=(q_in, q_out, stop_event), daemon=True)
+    worker.start()
+    try:
+        while True:
+            frames = latest_frames()
+            if frames is None:
+                continue
+            color_frame = frames.get_color_frame()
+            if not color_frame:
+                continue
+            frame = np.asanyarray(color_frame.get_data())
+            _put_latest(q_in, frame)
+            try:
+                frame, result = q_out.get_nowait()
+            except queue.Empty:
+                continue
+            now = time.monotonic()
+            h, w, _ = frame.shape
+            frame_idx += 1
+            show = frame_idx % DISPLAY_EVERY == 0
+            # The camera frame is not mirrored; only displayed frames get a mirrored copy
+            disp = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_RGB2BGR) if show else None
 
-        if origin_x is None or origin_y is None:
-            origin_x, origin_y = w // 2, h // 2
+            if origin_x is None or origin_y is None:
+                origin_x, origin_y = w // 2, h // 2
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        result = hands.process(rgb)
+            if result.multi_hand_landmarks:
+                for hand_landmarks in result.multi_hand_landmarks:
+                    lm = load_landmarks(hand_landmarks)
 
-        # L-gesture for landing
-        if result.multi_hand_landmarks:
-            for hand_landmarks in result.multi_hand_landmarks:
-                if is_l_gesture(hand_landmarks):
-                    print("✋ 'L' gesture detected - returning to launch and landing...")
+                    # L-gesture for landing
+                    if is_l_gesture(lm):
+                        print("✋ 'L' gesture detected - returning to launch and landing...")
+                        hlc.go_to(0, 0, DEFAULT_HEIGHT, 0.0, 2.0, relative=False)
+                        time.sleep(2.0)
+                        hlc.land(0.0, 2.0)
+                        time.sleep(2.5)
+                        return True
+
+                    palm_x, palm_y = lm[_PALM_IDX].mean(axis=0)
+                    cx_raw = w - int(palm_x * w)  # mirrored x, as if the frame had been flipped
+                    cy_raw = int(palm_y * h)
+                    cx, cy = adjust_coordinates(cx_raw, cy_raw, w, h)
+                    hand_disp = np.array([cx - origin_x, cy - origin_y], dtype=np.float32)
+                    disp_cm_x = hand_disp[0] / PIXELS_PER_CM
+                    disp_cm_y = hand_disp[1] / PIXELS_PER_CM
+                    desired_x = max(min(disp_cm_x * SCALE, FENCE_LIMIT), -FENCE_LIMIT)
+                    desired_y = max(min(-disp_cm_y * SCALE, FENCE_LIMIT), -FENCE_LIMIT)
+                    moved = abs(desired_x - current_x) > GOTO_DEADBAND or abs(desired_y - current_y) > GOTO_DEADBAND
+                    if moved and now - last_cmd_t > GOTO_MIN_INTERVAL:
+                        hlc.go_to(desired_x, desired_y, DEFAULT_HEIGHT, 0.0, 0.5, relative=False)
+                        last_cmd_t = now
+                        current_x, current_y = desired_x, desired_y
+                        print(f"🎯 Position Target: ({current_x:.2f}, {current_y:.2f}, {DEFAULT_HEIGHT})")
+                    if show:
+                        cv2.circle(disp, (cx_raw, cy_raw), 10, (0, 255, 0), -1)
+                        mirror_landmarks(hand_landmarks)
+                        mp_draw.draw_landmarks(disp, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+
+            # Timer
+            if flight_timer_enabled:
+                time_left = int(max(0, flight_time - (now - takeoff_time)))
+                if time_left <= 0:
+                    print("⏰ Flight time ended, returning to launch and landing...")
                     hlc.go_to(0, 0, DEFAULT_HEIGHT, 0.0, 2.0, relative=False)
                     time.sleep(2.0)
                     hlc.land(0.0, 2.0)
                     time.sleep(2.5)
                     return True
 
-        if result.multi_hand_landmarks:
-            for hand_landmarks in result.multi_hand_landmarks:
-                palm_indices = [0, 5, 9, 13, 17]
-                palm_x = sum(hand_landmarks.landmark[i].x for i in palm_indices) / len(palm_indices)
-                palm_y = sum(hand_landmarks.landmark[i].y for i in palm_indices) / len(palm_indices)
-                cx_raw = int(palm_x * w)
-                cy_raw = int(palm_y * h)
-                cx, cy = adjust_coordinates(cx_raw, cy_raw, w, h)
-                hand_disp = np.array([cx - origin_x, cy - origin_y], dtype=np.float32)
-                disp_cm_x = hand_disp[0] / PIXELS_PER_CM
-                disp_cm_y = hand_disp[1] / PIXELS_PER_CM
-                desired_x = max(min(disp_cm_x * SCALE, FENCE_LIMIT), -FENCE_LIMIT)
-                desired_y = max(min(-disp_cm_y * SCALE, FENCE_LIMIT), -FENCE_LIMIT)
-                if abs(desired_x - current_x) > 0.02 or abs(desired_y - current_y) > 0.02:
-                    hlc.go_to(desired_x, desired_y, DEFAULT_HEIGHT, 0.0, 0.5, relative=False)
-                    current_x, current_y = desired_x, desired_y
-                    print(f"🎯 Position Target: ({current_x:.2f}, {current_y:.2f}, {DEFAULT_HEIGHT})")
-                cv2.circle(frame, (cx_raw, cy_raw), 10, (0, 255, 0), -1)
-                mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+            # Overlays and the window only every DISPLAY_EVERY frames; detection and commands run every frame
+            if not show:
+                continue
 
-        # STATUS and BATTERY overlays
-        status_text = f"Flight timer: {'ON' if flight_timer_enabled else 'DISABLED - show L to land'}"
-        cv2.putText(frame, status_text, (10, 450), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,255), 2)
-        if battery_voltage is not None:
-            cv2.putText(frame, f'Battery: {battery_voltage:.2f} V', (10, 420), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
-
-        # Timer
-        if flight_timer_enabled:
-            time_left = int(max(0, flight_time - (time.time() - takeoff_time)))
-            cv2.putText(frame, f'Flight time left: {time_left}s', (10, 470), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,255), 2)
-            if time_left <= 0:
-                print("⏰ Flight time ended, returning to launch and landing...")
-                hlc.go_to(0, 0, DEFAULT_HEIGHT, 0.0, 2.0, relative=False)
-                time.sleep(2.0)
-                hlc.land(0.0, 2.0)
-                time.sleep(2.5)
-                return True
+            # STATUS and BATTERY overlays
+            status_text = f"Flight timer: {'ON' if flight_timer_enabled else 'DISABLED - show L to land'}"
+            draw_cached_text(disp, "status", status_text, (10, 450), 0.7, (0,255,255))
+            if battery_voltage is not None:
+                draw_cached_text(disp, "batt", f'Battery: {battery_voltage:.2f} V', (10, 420), 0.7, (0,255,0))
+            if flight_timer_enabled:
+                draw_cached_text(disp, "timer", f'Flight time left: {time_left}s', (10, 470), 0.7, (0,255,255))
 
-        cv2.imshow("Drone Hand Control - Live", frame)
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
-            break
-        elif key == ord('x') and flight_timer_enabled:
-            print("'x' pressed - disabling flight timer, land by showing 'L' gesture")
-            flight_timer_enabled = False
-    return False
+            cv2.imshow("Drone Hand Control - Live", disp)
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
+                break
+            elif key == ord('x') and flight_timer_enabled:
+                print("'x' pressed - disabling flight timer, land by showing 'L' gesture")
+                flight_timer_enabled = False
+        return False
+    finally:
+        stop_event.set()
+        worker.join(timeout=1.0)
 
 # ---------- Flight time (in seconds) ----------
 FLIGHT_TIME = 60
@@ -6,6 +6,11 @@ import os
 import sys
 import time
 
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # optional; without it we fall back to polling
+    INotify = None
+
 # === CONFIG: Update this path to match your app.py ===
 TOKEN_FILE = 'rfid_token.txt'  # Same folder as app.py
 DB_NAME = 'flycamp_framework.db'
@@ -24,16 +29,53 @@ def read_token_from_file():
         print(f"Error reading token file: {e}", file=sys.stderr)
         return None
 
-def main():
-    print("Waiting for token in rfid_token.txt...", file=sys.stderr)
-    
+def wait_for_token_inotify(timeout=None):
+    """Block until TOKEN_FILE holds a token, woken by inotify instead of a timer."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    watch_dir = os.path.dirname(os.path.abspath(TOKEN_FILE))
+    name = os.path.basename(TOKEN_FILE)
+    with INotify() as inot:
+        inot.add_watch(watch_dir, flags.CLOSE_WRITE | flags.MOVED_TO)
+        # the token may already have been written before the watch was added
+        token_id = read_token_from_file()
+        while token_id is None:
+            wait_ms = None
+            if deadline is not None:
+                wait_ms = int((deadline - time.monotonic()) * 1000)
+                if wait_ms <= 0:
+                    return None
+            for event in inot.read(timeout=wait_ms):
+                if event.name == name:
+                    token_id = read_token_from_file()
+                    if token_id is not None:
+                        break
+    return token_id
+
+def wait_for_token_polling(timeout=None):
+    deadline = None if timeout is None else time.monotonic() + timeout
     while True:
         token_id = read_token_from_file()
         if token_id is not None:
-            print(f"Token ID: {token_id}")
-            sys.stdout.flush()
-            break
+            return token_id
+        if deadline is not None and time.monotonic() >= deadline:
+            return None
         time.sleep(0.5)
 
+def read_token(timeout=None):
+    """Wait for a token and return it, or None if `timeout` seconds pass first.
+    Importable, so the Flask apps can call it without starting a new interpreter."""
+    if INotify is not None:
+        try:
+            return wait_for_token_inotify(timeout)
+        except OSError as e:
+            print(f"inotify unavailable ({e}), polling instead", file=sys.stderr)
+    return wait_for_token_polling(timeout)
+
+def main():
+    print("Waiting for token in rfid_token.txt...", file=sys.stderr)
+    token_id = read_token()
+    print(f"Token ID: {token_id}")
+    sys.stdout.flush()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
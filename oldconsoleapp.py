@@ -1,12 +1,28 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, g
 import sqlite3
 import subprocess
 import os
 import json
+import queue
 import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # optional; without it /game_done stats the flag on every poll
+    INotify = None
+
+try:
+    import orjson
+except ImportError:  # optional; without it the leaderboard uses Flask's jsonify
+    orjson = None
+
+import get_id
+from db import ConnectionPool, ensure_schema, release
+
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
 DB_PATH = '/home/devesh/CONSOLE/nfctest/flycamp_project/flycamp_framework.db'
@@ -14,29 +30,172 @@ TOKEN_FILE = '/home/devesh/rfid_token.txt'           # absolute path so games ca
 GAME_META_FILE = '/home/devesh/game_meta.json'       # game/level selection for scripts to read
 GAME_DONE_FLAG = '/home/devesh/game_done.flag'       # completion flag written by game scripts
 SOUND_DIR = '/home/devesh/CONSOLE/nfctest/flycamp_project/static/assets/sounds'
+TZ_IST = ZoneInfo("Asia/Kolkata")  # loaded once, not per request
+SCAN_TIMEOUT = 10  # seconds to wait for a token before giving up
+GAME_LAUNCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'game_launcher.py')
 
 # --- Helpers -----------------------------------------------------------------
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+# One writer (the score writer thread) + a few readers; opened lazily and reused across requests
+_writer_pool = ConnectionPool(DB_PATH, 1)
+_reader_pool = ConnectionPool(DB_PATH, 8)
+
+def get_db_connection(write=False):
+    """Borrow a pooled connection for this request; it is returned in release_db()."""
+    conn = (_writer_pool if write else _reader_pool).acquire()
+    g.setdefault('db_conns', []).append(conn)
     return conn
 
+@app.teardown_request
+def release_db(exc=None):
+    for conn in g.pop('db_conns', ()):
+        release(conn)
+
+# submit_score statements, kept constant so sqlite3's statement cache reuses them
+SQL_INSERT_PLAY = """
+    INSERT INTO GamePlays (token_id, game_number, level_number, score, begin_timestamp, end_timestamp)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SQL_UPSERT_BEST = """
+    INSERT INTO PlayerBests (token_id, game_number, level_number, highest_score, timestamp_achieved)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(token_id, game_number, level_number) DO UPDATE SET
+        highest_score = excluded.highest_score,
+        timestamp_achieved = excluded.timestamp_achieved
+    WHERE excluded.highest_score > PlayerBests.highest_score
+"""
+
+# Score writes go through one writer thread that commits up to WRITE_BATCH_MAX
+# queued submits per transaction (one fsync for the lot instead of one each)
+WRITE_BATCH_MAX = 16
+WRITE_BATCH_WAIT = 0.01   # seconds to wait for more submits before committing
+WRITE_TIMEOUT = 10        # seconds a request waits for its write
+_write_q = queue.Queue()
+
+def _apply_score(conn, token_id, game_number, level_number, score, now_ts):
+    conn.execute(SQL_INSERT_PLAY, (token_id, game_number, level_number, score, now_ts, now_ts))
+    conn.execute(SQL_UPSERT_BEST, (token_id, game_number, level_number, score, now_ts))
+
+def _write_batch(batch):
+    """Apply one batch in one transaction; returns a per-item list of sqlite3 errors (or None)."""
+    errors = [None] * len(batch)
+    conn = _writer_pool.acquire()
+    try:
+        try:
+            with conn:
+                for args, _ in batch:
+                    _apply_score(conn, *args)
+        except sqlite3.Error:
+            # One bad submit rolled the batch back: redo them one by one
+            for i, (args, _) in enumerate(batch):
+                try:
+                    with conn:
+                        _apply_score(conn, *args)
+                except sqlite3.Error as e:
+                    errors[i] = e
+    finally:
+        release(conn)
+    return errors
+
+def _score_writer():
+    while True:
+        batch = [_write_q.get()]
+        deadline = time.monotonic() + WRITE_BATCH_WAIT
+        while len(batch) < WRITE_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_write_q.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # Claim each item; submits that already timed out (and cancelled) are dropped
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            continue
+
+        try:
+            errors = _write_batch(batch)
+        except Exception as e:
+            # Anything else (e.g. the writer connection can't be opened) fails this
+            # batch only; the writer thread keeps serving the queue.
+            print(f"[score_writer] Batch of {len(batch)} failed: {e!r}")
+            errors = [e] * len(batch)
+
+        for (_, fut), err in zip(batch, errors):
+            if err is None:
+                fut.set_result(True)
+            else:
+                fut.set_exception(err)
+
+LEADERBOARD_SIZE = 50
+SQL_LEADERBOARD = f"""
+    SELECT pr.player_name, SUM(pt.total_score) AS total_score
+    FROM PlayerTotals AS pt
+    JOIN PlayerRegistrations AS pr ON pr.token_id = pt.token_id
+    GROUP BY pr.player_name  -- a player with several tokens is one row, as before
+    ORDER BY 2 DESC
+    LIMIT {LEADERBOARD_SIZE}
+"""
+
 def run_connection_check():
     # DEBUG: always succeed
     return True
 
+# One background worker plays every cue; clips queued while mpg123 is busy are
+# handed to the next single mpg123 run together.
+_sound_q = queue.Queue(maxsize=32)
+
+def _sound_worker():
+    while True:
+        paths = list(_sound_q.get())
+        while True:
+            try:
+                paths += _sound_q.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            subprocess.run(["mpg123", "-q", *paths])
+        except Exception as e:
+            print(f"[sound_worker] mpg123 failed: {e}")
+
+def play_sounds(filenames):
+    """Queue MP3s to play back-to-back in one mpg123 process (one fork, one ALSA open, no gaps)."""
+    paths = []
+    for filename in filenames:
+        full_path = os.path.join(SOUND_DIR, filename)
+        if os.path.exists(full_path):
+            paths.append(full_path)
+        else:
+            print(f"[play_sounds] Missing file: {full_path}")
+    if paths:
+        try:
+            _sound_q.put_nowait(paths)
+        except queue.Full:
+            print(f"[play_sounds] Sound queue full, dropping: {paths}")
+
 def play_sound(filename: str):
     """Play an MP3 sound file asynchronously using mpg123."""
-    full_path = os.path.join(SOUND_DIR, filename)
-    if os.path.exists(full_path):
-        threading.Thread(target=lambda: subprocess.run(["mpg123", "-q", full_path])).start()
-    else:
-        print(f"[play_sound] Missing file: {full_path}")
+    play_sounds([filename])
+
+def _silent_unlink(path):
+    # One unlink() instead of exists()+remove(), and no race between the two
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def _write_game_meta(game_number, level_number):
+    fd = os.open(GAME_META_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, json.dumps({"game_number": game_number, "level_number": level_number}).encode())
+    finally:
+        os.close(fd)
 
 def start_game_process(game_number: int, level_number: int):
     """
-    Maps selection to the exact script path and launches it via Popen.
+    Maps selection to the exact script path and launches it via launch_game().
     Also:
       - clears any stale game_done flag BEFORE start (prevents early leaderboard)
       - writes GAME_META_FILE so the game knows game/level (optional feature enabled)
@@ -45,15 +204,14 @@ def start_game_process(game_number: int, level_number: int):
     try:
         # --- CLEAR OLD DONE FLAG BEFORE STARTING ---
         try:
-            if os.path.exists(GAME_DONE_FLAG):
-                os.remove(GAME_DONE_FLAG)
+            _silent_unlink(GAME_DONE_FLAG)
         except Exception as e:
             print(f"[start_game_process] Could not remove old flag: {e}")
+        _done_evt.clear()
 
         # --- WRITE selection for the game to read (optional: enabled) ---
         try:
-            with open(GAME_META_FILE, "w") as m:
-                json.dump({"game_number": game_number, "level_number": level_number}, m)
+            _write_game_meta(game_number, level_number)
         except Exception as e:
             print(f"[start_game_process] Could not write game_meta.json: {e}")
 
@@ -67,19 +225,76 @@ def start_game_process(game_number: int, level_number: int):
         else:
             return (False, f"Invalid game/level selection: G{game_number} L{level_number}")
 
-        # Play button tap + initialization voice line (keep existing start sound too)
-        play_sound("button selection.mp3")
-        play_sound("initialising drone and nodes before game.mp3")
-
-        subprocess.Popen(['python3', script])
-        play_sound("game_start.mp3")
+        # Button tap + initialization voice line + start sound, as one playlist
+        play_sounds(["button selection.mp3",
+                     "initialising drone and nodes before game.mp3",
+                     "game_start.mp3"])
+        launch_game(script)
         return (True, None)
     except Exception as e:
         return (False, str(e))
 
+# Prewarmed game_launcher.py process; games are forked from it instead of
+# starting a new interpreter per click (the game scripts build their Tk window
+# and MQTT client at import, so they cannot be preloaded into this process).
+_launcher = None
+_launcher_lock = threading.Lock()
+
+def start_game_launcher():
+    global _launcher
+    _launcher = subprocess.Popen(['python3', GAME_LAUNCHER], stdin=subprocess.PIPE, text=True)
+
+def launch_game(script):
+    """Hand the script to the launcher; Popen it directly if the launcher is gone."""
+    with _launcher_lock:
+        try:
+            if _launcher is None or _launcher.poll() is not None:
+                start_game_launcher()
+            _launcher.stdin.write(script + '\n')
+            _launcher.stdin.flush()
+            return
+        except Exception as e:
+            print(f"[launch_game] Launcher unavailable ({e}), starting {script} directly")
+    subprocess.Popen(['python3', script])
+
+# Set by the inotify thread when a game writes GAME_DONE_FLAG, so /game_done
+# answers from memory. _done_inotify stays None when inotify is unavailable.
+_done_evt = threading.Event()
+_done_inotify = None
+
+def _watch_done_flag(inot):
+    name = os.path.basename(GAME_DONE_FLAG)
+    while True:
+        for event in inot.read():
+            if event.name == name:
+                _done_evt.set()
+
+def start_done_watcher():
+    global _done_inotify
+    if INotify is None:
+        return
+    try:
+        inot = INotify()
+        # Complete files only: CREATE would fire a second, early event for writers that
+        # open the flag in place, re-setting _done_evt after /game_done cleared it
+        inot.add_watch(os.path.dirname(GAME_DONE_FLAG), flags.CLOSE_WRITE | flags.MOVED_TO)
+    except OSError as e:
+        print(f"[start_done_watcher] inotify unavailable ({e}), /game_done will stat the flag")
+        return
+    _done_inotify = inot
+    if os.path.exists(GAME_DONE_FLAG):  # written before the watch existed
+        _done_evt.set()
+    threading.Thread(target=_watch_done_flag, args=(inot,), daemon=True).start()
+
 def get_token_id_from_script():
+    # In-process first: no new interpreter per scan
     try:
-        result = subprocess.run(['python3', 'get_id.py'], capture_output=True, text=True, timeout=10)
+        return get_id.read_token(timeout=SCAN_TIMEOUT)
+    except Exception as e:
+        print(f"get_id.read_token failed ({e}), falling back to get_id.py")
+
+    try:
+        result = subprocess.run(['python3', 'get_id.py'], capture_output=True, text=True, timeout=SCAN_TIMEOUT)
         output = result.stdout.strip()
         if "Token ID:" in output:
             token_id = int(output.split("Token ID:")[1].strip())
@@ -90,6 +305,12 @@ def get_token_id_from_script():
         print(f"Error reading token ID from get_id.py: {e}")
         return None
 
+ensure_schema(_writer_pool)
+threading.Thread(target=_sound_worker, daemon=True).start()
+threading.Thread(target=_score_writer, daemon=True).start()
+start_game_launcher()
+start_done_watcher()
+
 # --- Routes: UI ---------------------------------------------------------------
 
 @app.route('/')
@@ -111,12 +332,10 @@ def scan_rfid():
     cursor = conn.cursor()
     cursor.execute("SELECT player_name FROM PlayerRegistrations WHERE token_id = ?", (token_id,))
     row = cursor.fetchone()
-    conn.close()
 
     if row:
         # Success chime when the name pops up
-        play_sound("name and rfid pops up.mp3")
-        play_sound("rfid_success.mp3")
+        play_sounds(["name and rfid pops up.mp3", "rfid_success.mp3"])
         return jsonify({'success': True, 'name': row['player_name'], 'token_id': token_id})
     else:
         play_sound("rfid_error.mp3")
@@ -162,18 +381,16 @@ def api_start_game():
 def start_hue_game():
     try:
         # Clear stale flag for legacy entry points too
-        if os.path.exists(GAME_DONE_FLAG):
-            os.remove(GAME_DONE_FLAG)
+        _silent_unlink(GAME_DONE_FLAG)
+        _done_evt.clear()
         # Write meta for legacy call (defaults: game 2, level 1)
-        with open(GAME_META_FILE, "w") as m:
-            json.dump({"game_number": 2, "level_number": 1}, m)
-
-        # Button confirm + init line, keep existing start sound
-        play_sound("button selection.mp3")
-        play_sound("initialising drone and nodes before game.mp3")
+        _write_game_meta(2, 1)
 
-        subprocess.Popen(['python3', '/home/devesh/gamescripts/huestheboss.py'])
-        play_sound("game_start.mp3")
+        # Button confirm + init line + start sound, as one playlist
+        play_sounds(["button selection.mp3",
+                     "initialising drone and nodes before game.mp3",
+                     "game_start.mp3"])
+        launch_game('/home/devesh/gamescripts/huestheboss.py')
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -182,18 +399,16 @@ def start_hue_game():
 def start_hover_game():
     try:
         # Clear stale flag for legacy entry points too
-        if os.path.exists(GAME_DONE_FLAG):
-            os.remove(GAME_DONE_FLAG)
+        _silent_unlink(GAME_DONE_FLAG)
+        _done_evt.clear()
         # Write meta for legacy call (defaults: game 1, level 1)
-        with open(GAME_META_FILE, "w") as m:
-            json.dump({"game_number": 1, "level_number": 1}, m)
-
-        # Button confirm + init line, keep existing start sound
-        play_sound("button selection.mp3")
-        play_sound("initialising drone and nodes before game.mp3")
+        _write_game_meta(1, 1)
 
-        subprocess.Popen(['python3', '/home/devesh/gamescripts/hoverandseek.py'])
-        play_sound("game_start.mp3")
+        # Button confirm + init line + start sound, as one playlist
+        play_sounds(["button selection.mp3",
+                     "initialising drone and nodes before game.mp3",
+                     "game_start.mp3"])
+        launch_game('/home/devesh/gamescripts/hoverandseek.py')
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -204,7 +419,7 @@ def start_hover_game():
 def submit_score():
     """
     Expects: token_id (int), game_number (int), level_number (int), score (int)
-    Inserts a row in GamePlays and updates PlayerBests (manual upsert).
+    Inserts a row in GamePlays and upserts PlayerBests (only raises the best).
     """
     data = request.get_json()
     token_id = data.get('token_id')
@@ -226,86 +441,62 @@ def submit_score():
     except ValueError:
         return jsonify({'success': False, 'error': 'Invalid numeric fields'})
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    now_ts = int(datetime.now(tz=TZ_IST).timestamp())
 
+    # Raw play + best-score upsert, committed by the score writer thread
+    done = Future()
+    _write_q.put(((token_id, game_number, level_number, score, now_ts), done))
     try:
-        now_ts = int(datetime.now(tz=ZoneInfo("Asia/Kolkata")).timestamp())
-
-        # 1) Insert raw play
-        cursor.execute("""
-            INSERT INTO GamePlays (token_id, game_number, level_number, score, begin_timestamp, end_timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (token_id, game_number, level_number, score, now_ts, now_ts))
-
-        # 2) Manual upsert for PlayerBests
-        cursor.execute("""
-            SELECT player_best_id, highest_score
-            FROM PlayerBests
-            WHERE token_id = ? AND game_number = ? AND level_number = ?
-            ORDER BY player_best_id LIMIT 1
-        """, (token_id, game_number, level_number))
-        row = cursor.fetchone()
-
-        if row is None:
-            cursor.execute("""
-                INSERT INTO PlayerBests (token_id, game_number, level_number, highest_score, timestamp_achieved)
-                VALUES (?, ?, ?, ?, ?)
-            """, (token_id, game_number, level_number, score, now_ts))
-        else:
-            player_best_id = row['player_best_id']
-            prev = row['highest_score'] or 0
-            if score > prev:
-                cursor.execute("""
-                    UPDATE PlayerBests
-                    SET highest_score = ?, timestamp_achieved = ?
-                    WHERE player_best_id = ?
-                """, (score, now_ts, player_best_id))
-
-        conn.commit()
+        done.result(timeout=WRITE_TIMEOUT)
+
         # Sound for score reveal / scoreboard moment (keep existing submit sound)
-        play_sound("final score display.mp3")
-        play_sound("score_submit.mp3")
+        play_sounds(["final score display.mp3", "score_submit.mp3"])
         return jsonify({'success': True, 'message': 'Score submitted and stats updated.'})
 
     except sqlite3.Error as e:
-        conn.rollback()
         return jsonify({'success': False, 'error': f'Database error: {e}'})
-    finally:
-        conn.close()
+    except FutureTimeout:
+        if done.cancel():
+            # Still queued: withdrawn, so a retry can't insert the play twice
+            return jsonify({'success': False, 'error': 'Database busy, score not saved'})
+        # Already being written by the score writer; it will be committed
+        return jsonify({'success': True, 'queued': True, 'message': 'Score accepted, still being saved.'})
+    except Exception as e:
+        # The writer failed the whole batch (see _score_writer); nothing was saved
+        return jsonify({'success': False, 'error': f'Score not saved: {e}'})
 
 @app.route('/get_leaderboard')
 def get_leaderboard():
     conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute("""
-            SELECT
-                pr.player_name,
-                COALESCE(SUM(pb.highest_score), 0) AS total_score
-            FROM PlayerBests AS pb
-            JOIN PlayerRegistrations AS pr ON pb.token_id = pr.token_id
-            GROUP BY pr.player_name
-            ORDER BY total_score DESC
-        """)
-        rows = cursor.fetchall()
-        leaderboard_data = [{'name': row['player_name'], 'score': row['total_score']} for row in rows]
+        # PlayerTotals is kept current by triggers on PlayerBests, so this is a
+        # GROUP BY over the small per-token totals instead of over every best
+        rows = conn.execute(SQL_LEADERBOARD).fetchall()
+        payload = {'success': True,
+                   'leaderboard': [{'name': row['player_name'], 'score': row['total_score']} for row in rows]}
         # Use the "final score display" sound when the leaderboard shows (keep existing)
-        play_sound("final score display.mp3")
-        play_sound("leaderboard.mp3")
-        return jsonify({'success': True, 'leaderboard': leaderboard_data})
+        play_sounds(["final score display.mp3", "leaderboard.mp3"])
+        if orjson is not None:
+            return app.response_class(orjson.dumps(payload), mimetype='application/json')
+        return jsonify(payload)
     except sqlite3.Error as e:
         print(f"Error fetching leaderboard data: {e}")
         return jsonify({'success': False, 'error': str(e)})
-    finally:
-        conn.close()
 
 # --- Game done flag -----------------------------------------------------------
 
 @app.route('/game_done')
 def game_done():
-    if os.path.exists(GAME_DONE_FLAG):
-        os.remove(GAME_DONE_FLAG)
+    if _done_inotify is not None:
+        done = _done_evt.is_set()
+        if done:
+            _done_evt.clear()
+            _silent_unlink(GAME_DONE_FLAG)
+    else:
+        done = os.path.exists(GAME_DONE_FLAG)
+        if done:
+            os.remove(GAME_DONE_FLAG)
+    if done:
         # Play return-to-home audio cue when game completes
         play_sound("drone back to home.mp3")
         return jsonify({'done': True})
@@ -315,4 +506,14 @@ def game_done():
 # --- Main --------------------------------------------------------------------
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
+    # waitress with a small thread pool by default; DEV_SERVER=1 keeps the Flask dev server
+    if os.environ.get('DEV_SERVER') == '1':
+        app.run(host='0.0.0.0', port=5000)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("waitress not installed, falling back to the Flask dev server")
+            app.run(host='0.0.0.0', port=5000)
+        else:
+            serve(app, host='0.0.0.0', port=5000, threads=8)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+prep_daemon.py
+Long-lived readiness checker for the RC car and the nodes.
+
+- Keeps ONE MQTT connection open with game/ready/# pre-subscribed, so a check
+  pays no TCP connect, MQTT CONNECT or SUBSCRIBE round-trip.
+- Listens on a UNIX socket (PREP_SOCK env, default /run/flycamp_prep.sock).
+  Each connection sends one JSON line and gets one JSON line back:
+    {"op": "check_car", "timeout": 10}
+    {"op": "check_nodes", "nodes": ["node1", ...], "visual": "shieldworld", "timeout": 10}
+  -> {"ok": true|false, "seen": [...], "missing": [...]}
+- prepare_car.py / prepare_nodes.py / consoleapp.py call request() and fall back
+  to their own MQTT client when the daemon is not running.
+
+Run:  python3 prep_daemon.py
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+# === Broker & topics (same as prepare_car.py / prepare_nodes.py) ===
+BROKER = "192.168.0.18"
+PORT = 1883
+SOCK_PATH = os.environ.get("PREP_SOCK", "/run/flycamp_prep.sock")
+
+READY_TOPICS = "game/ready/#"
+RESET_TOPIC = "game/reset"
+PREPARE_TOPIC = "game/prepare"
+
+CAR_ID = "car1"
+NODES = ["node1", "node2", "node3", "node4", "node5"]
+DEFAULT_VISUAL = "shieldworld"
+DEFAULT_TIMEOUT = 10.0
+RESET_GRACE = 0.2   # let nodes finish their reset handlers before the visual
+
+# node_id -> time.monotonic() of its last 'ready'; guarded by ready_cond
+last_ready = {}
+ready_cond = threading.Condition()
+client = None
+
+
+# === MQTT side ===
+def on_connect(cli, u, f, rc):
+    if rc != 0:
+        print(f"[prep_daemon] MQTT connect failed rc={rc}")
+        return
+    cli.subscribe(READY_TOPICS, qos=1)
+    print(f"[prep_daemon] Connected to {BROKER}:{PORT}, subscribed {READY_TOPICS}")
+
+def on_message(cli, u, msg):
+    if msg.payload.strip().lower() != b"ready":
+        return
+    nid = msg.topic.rsplit("/", 1)[-1]
+    with ready_cond:
+        last_ready[nid] = time.monotonic()
+        ready_cond.notify_all()
+
+def wait_ready(ids, since, timeout):
+    """Block until every id has acked at/after `since` (or timeout); return those that did."""
+    def acked(n):
+        return n in last_ready and last_ready[n] >= since
+
+    with ready_cond:
+        ready_cond.wait_for(lambda: all(acked(n) for n in ids), timeout=timeout)
+        return [n for n in ids if acked(n)]
+
+def run_check(ids, timeout, reset=True, visual=None):
+    # Without a reset/prepare nothing prompts a fresh ack, so any ack already seen counts
+    since = time.monotonic() if (reset or visual) else float("-inf")
+    if reset:
+        client.publish(RESET_TOPIC, "reset", qos=0, retain=False)
+        if visual:
+            time.sleep(RESET_GRACE)
+    if visual:
+        client.publish(PREPARE_TOPIC, visual, qos=0, retain=False)
+    seen = wait_ready(ids, since, timeout)
+    return {"ok": len(seen) == len(ids), "seen": seen, "missing": [n for n in ids if n not in seen]}
+
+
+# === Socket side ===
+class PrepHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            req = json.loads(self.rfile.readline())
+            op = req.get("op")
+            timeout = float(req.get("timeout", DEFAULT_TIMEOUT))
+            if not client.is_connected():
+                resp = {"ok": False, "error": "MQTT not connected"}
+            elif op == "check_car":
+                resp = run_check([CAR_ID], timeout, reset=req.get("reset", True))
+            elif op == "check_nodes":
+                resp = run_check(list(req.get("nodes", NODES)), timeout,
+                                 reset=req.get("reset", True),
+                                 visual=req.get("visual", DEFAULT_VISUAL))
+            else:
+                resp = {"ok": False, "error": f"unknown op {op!r}"}
+        except (ValueError, TypeError, AttributeError) as e:
+            resp = {"ok": False, "error": f"bad request: {e}"}
+        self.wfile.write((json.dumps(resp) + "\n").encode())
+
+
+def request(req, timeout=DEFAULT_TIMEOUT):
+    """Client helper: send one request to a running daemon.
+    Returns the reply dict, or None if the daemon is unreachable or reports an error."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout + 5)
+            s.connect(SOCK_PATH)
+            s.sendall((json.dumps(dict(req, timeout=timeout)) + "\n").encode())
+            resp = json.loads(s.makefile("rb").readline())
+    except (OSError, ValueError):
+        return None
+    return None if "error" in resp else resp
+
+
+def main():
+    global client
+    import paho.mqtt.client as mqtt  # daemon only; request() callers don't need paho
+    client = mqtt.Client(client_id=f"prep_daemon_{int(time.time())}", clean_session=True)
+    client.on_connect = on_connect
+    client.on_message = on_message
+    client.reconnect_delay_set(min_delay=1, max_delay=10)
+    client.connect_async(BROKER, PORT, keepalive=60)
+    client.loop_start()
+
+    try:
+        os.unlink(SOCK_PATH)  # stale socket from a previous run
+    except FileNotFoundError:
+        pass
+    server = socketserver.ThreadingUnixStreamServer(SOCK_PATH, PrepHandler)
+    server.daemon_threads = True
+    print(f"[prep_daemon] Listening on {SOCK_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        client.loop_stop()
+        try:
+            os.unlink(SOCK_PATH)
+        except FileNotFoundError:
+            pass
+
+if __name__ == "__main__":
+    main()
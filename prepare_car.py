@@ -8,6 +8,7 @@ Checks readiness of your RC car (CAR_ID='car1') on your MQTT broker.
 - Publishes once:  game/reset = 'reset'   (prompts car to re-announce ready)
 - Waits up to TIMEOUT seconds for payload 'ready'
 - Exits code 0 (ready) or 1 (not ready)
+- If prep_daemon.py is running, asks it instead (no new broker connection)
 
 Note: 'game/reset' is a global topic in your setup; other nodes may also reset and
 publish their own ready acks to their own topics. This script listens ONLY to car1.
@@ -15,8 +16,11 @@ publish their own ready acks to their own topics. This script listens ONLY to ca
 
 import sys
 import time
+import threading
 import paho.mqtt.client as mqtt
 
+import prep_daemon
+
 # === Broker & Device (from your car code) ===
 BROKER = "192.168.0.18"
 PORT = 1883
@@ -28,8 +32,9 @@ RESET_TOPIC = "game/reset"             # from your sketch
 TIMEOUT = 10.0      # seconds to wait for ready
 SEND_RESET = True  # set False if you just want to listen
 
-def main():
-    got_ready = {"ok": False}
+def wait_for_car():
+    """Own MQTT client: connect, subscribe, reset, and wait for 'ready'."""
+    ready_evt = threading.Event()  # set by on_message, waited on by main
 
     def on_connect(cli, u, f, rc):
         if rc != 0:
@@ -48,7 +53,7 @@ def main():
         payload = msg.payload.decode().strip().lower()
         print(f"[prepare_car] {msg.topic} = {payload}")
         if payload == "ready":
-            got_ready["ok"] = True
+            ready_evt.set()
 
     client = mqtt.Client(client_id=f"prepare_car_{int(time.time())}", clean_session=True)
     client.on_connect = on_connect
@@ -61,17 +66,23 @@ def main():
         sys.exit(1)
 
     client.loop_start()
-    start = time.time()
     try:
-        while time.time() - start < TIMEOUT:
-            if got_ready["ok"]:
-                print("[prepare_car] Car is READY ✅")
-                client.loop_stop()
-                sys.exit(0)
-            time.sleep(0.05)
+        return ready_evt.wait(TIMEOUT)
     finally:
         client.loop_stop()
 
+def main():
+    resp = prep_daemon.request({"op": "check_car", "reset": SEND_RESET}, TIMEOUT)
+    if resp is not None:
+        print(f"[prepare_car] prep_daemon: {resp}")
+        ready = resp["ok"]
+    else:
+        ready = wait_for_car()
+
+    if ready:
+        print("[prepare_car] Car is READY ✅")
+        sys.exit(0)
+
     print("[prepare_car] Timeout: did not see 'ready' from car1 ⚠️")
     print("Hints:")
     print(" • Ensure the car is powered, on Wi-Fi, and connected to MQTT")
@@ -8,6 +8,7 @@ Prime nodes, play a visible animation, and verify readiness.
 - Publishes: game/prepare = <visual>     (defaults to 'shieldworld')
 - Subscribes: game/ready/<node> ('ready')
 - Exits 0 when all listed nodes ack; else 1 on timeout.
+- If prep_daemon.py is running (default broker only), asks it instead.
 
 Examples:
   python prepare_nodes.py
@@ -19,9 +20,12 @@ Examples:
 
 import sys
 import time
+import threading
 import argparse
 import paho.mqtt.client as mqtt
 
+import prep_daemon
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--broker", default="192.168.0.18", help="MQTT broker host/IP")
@@ -36,11 +40,28 @@ def main():
     args = ap.parse_args()
 
     nodes = [n.strip() for n in args.nodes.split(",") if n.strip()]
+
+    # The daemon already holds a subscribed connection to the default broker
+    if (args.broker, args.port) == (prep_daemon.BROKER, prep_daemon.PORT):
+        resp = prep_daemon.request({"op": "check_nodes", "nodes": nodes,
+                                    "reset": not args.no_reset,
+                                    "visual": None if args.no_prepare else args.visual},
+                                   args.timeout)
+        if resp is not None:
+            if resp["ok"]:
+                print("[prep] ALL nodes ready ✅ (prep_daemon)")
+                sys.exit(0)
+            print(f"[prep] timeout. Missing: {resp['missing']} ❌")
+            sys.exit(1)
+
     ready_topics = [f"game/ready/{n}" for n in nodes]
     RESET_TOPIC = "game/reset"
     PREPARE_TOPIC = "game/prepare"
 
     seen = set()
+    all_seen_evt = threading.Event()  # set once every node has acked
+    if seen.issuperset(nodes):        # nothing to wait for (empty node list)
+        all_seen_evt.set()
 
     def on_connect(cli, u, f, rc):
         if rc != 0:
@@ -68,6 +89,8 @@ def main():
         if nid not in seen:
             print(f"[prep] {nid} READY ✅")
         seen.add(nid)
+        if seen.issuperset(nodes):
+            all_seen_evt.set()
 
     client = mqtt.Client(client_id=f"nodes_preparer_{int(time.time())}", clean_session=True)
     client.on_connect = on_connect
@@ -80,17 +103,15 @@ def main():
         sys.exit(1)
 
     client.loop_start()
-    start = time.time()
     try:
-        while time.time() - start < args.timeout:
-            if len(seen) == len(nodes):
-                print("[prep] ALL nodes ready ✅")
-                client.loop_stop()
-                sys.exit(0)
-            time.sleep(0.05)
+        all_ready = all_seen_evt.wait(args.timeout)
     finally:
         client.loop_stop()
 
+    if all_ready:
+        print("[prep] ALL nodes ready ✅")
+        sys.exit(0)
+
     missing = [n for n in nodes if n not in seen]
     print(f"[prep] timeout. Missing: {missing} ❌")
     sys.exit(1)
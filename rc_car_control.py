@@ -11,7 +11,8 @@ Usage:
 
 Notes:
   - This script first attempts to use pyserial (recommended). If pyserial is not installed,
-    it falls back to opening the device file directly.
+    it falls back to opening the device file directly. Either way the device is opened
+    once and kept open between the two bytes.
   - You may need appropriate permissions to write to /dev/ttyACM1 (run with sudo or add your user
     to the dialout/tty group as appropriate).
   - If your device node is different, change DEVICE below.
@@ -28,41 +29,28 @@ SEND_SECOND = b'0'  # ASCII 0
 DELAY_SECONDS = 30
 
 
-def write_direct(device_path: str, data: bytes) -> None:
+def open_device(device_path: str, baudrate: int):
     """
-    Write bytes directly to device file.
-    """
-    with open(device_path, "wb", buffering=0) as f:
-        f.write(data)
-
-
-def write_serial(device_path: str, data: bytes, baudrate: int = 921600) -> None:
-    """
-    Write bytes using pyserial.Serial for more robust serial setup.
-    """
-    import serial
-    with serial.Serial(device_path, baudrate=baudrate, timeout=1) as ser:
-        ser.write(data)
-        ser.flush()
-
-
-def send_byte(device: str, data: bytes) -> None:
-    """
-    Try to send data using pyserial if available; otherwise fall back to direct write.
+    Open the device ONCE for the whole game: pyserial.Serial if available,
+    otherwise the raw device file. Re-opening per byte toggles DTR, which resets
+    many USB CDC boards.
     """
     try:
-        # Try to import serial (pyserial)
-        write_serial(device, data, BAUDRATE)
-        print(f"Sent {data!r} to {device} via pyserial.")
+        import serial
+        dev = serial.Serial(device_path, baudrate=baudrate, timeout=1)
+        print(f"Opened {device_path} via pyserial.")
+        return dev
     except Exception as e:
-        # If anything goes wrong (module not installed or serial open error),
-        # attempt direct write and surface a helpful message.
-        try:
-            write_direct(device, data)
-            print(f"Sent {data!r} to {device} via direct device write.")
-        except Exception as e2:
-            print(f"Failed to write to {device}: {e2}", file=sys.stderr)
-            raise
+        # Module not installed or serial open error: fall back to a direct write
+        dev = open(device_path, "wb", buffering=0)
+        print(f"Opened {device_path} for direct device write ({e}).")
+        return dev
+
+
+def send_byte(dev, data: bytes) -> None:
+    dev.write(data)
+    dev.flush()
+    print(f"Sent {data!r} to {DEVICE}.")
 
 
 def ensure_device_exists(device_path: str) -> None:
@@ -78,14 +66,15 @@ def main():
         sys.exit(2)
 
     try:
-        # "Game started" — send ASCII '2'
-        send_byte(DEVICE, SEND_FIRST)
+        with open_device(DEVICE, BAUDRATE) as dev:
+            # "Game started" — send ASCII '2'
+            send_byte(dev, SEND_FIRST)
 
-        # Wait for 15 seconds (while the game is running)
-        time.sleep(DELAY_SECONDS)
+            # Wait for DELAY_SECONDS (while the game is running)
+            time.sleep(DELAY_SECONDS)
 
-        # Send ASCII '0'
-        send_byte(DEVICE, SEND_SECOND)
+            # Send ASCII '0'
+            send_byte(dev, SEND_SECOND)
     except Exception as exc:
         print(f"Error during send sequence: {exc}", file=sys.stderr)
         sys.exit(1)
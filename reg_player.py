@@ -1,36 +1,59 @@
 import sqlite3
+import time
 
 DB_NAME = 'flycamp_framework.db'
 
-def get_next_rfid_token(cursor):
-    cursor.execute("SELECT MAX(CAST(token_id AS INTEGER)) FROM PlayerRegistrations")
-    result = cursor.fetchone()
-    return (result[0] or 0) + 1
-
-def register_player():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-
+# One atomic statement: next token = MAX(token_id)+1 (served by the token_id
+# UNIQUE index), nothing inserted if the name is already taken.
+SQL_REGISTER = """
+    INSERT INTO PlayerRegistrations (player_name, token_id, registration_timestamp)
+    VALUES (?, (SELECT COALESCE(MAX(token_id), 0) + 1 FROM PlayerRegistrations), ?)
+    ON CONFLICT(player_name) DO NOTHING
+    RETURNING token_id
+"""
+
+# Fallback when ux_pr_name can't exist: same atomic insert, guarded by NOT EXISTS
+SQL_REGISTER_NO_INDEX = """
+    INSERT INTO PlayerRegistrations (player_name, token_id, registration_timestamp)
+    SELECT :name, (SELECT COALESCE(MAX(token_id), 0) + 1 FROM PlayerRegistrations), :ts
+    WHERE NOT EXISTS (SELECT 1 FROM PlayerRegistrations WHERE player_name = :name)
+    RETURNING token_id
+"""
+
+def ensure_name_index(conn):
+    """ON CONFLICT(player_name) needs a unique index on the name. Returns False
+    (after reporting the duplicates) when existing rows make one impossible."""
+    try:
+        with conn:
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_pr_name ON PlayerRegistrations(player_name)")
+        return True
+    except sqlite3.IntegrityError:
+        dupes = conn.execute("SELECT player_name, COUNT(*) FROM PlayerRegistrations "
+                             "GROUP BY player_name HAVING COUNT(*) > 1").fetchall()
+        print("[!] Duplicate player names prevent a unique name index:")
+        for name, count in dupes:
+            print(f"    '{name}' x{count}")
+        return False
+
+def register_player(conn, name_indexed=True):
     name = input("Enter your name: ").strip()
 
-    # Check if player already exists
-    cursor.execute("SELECT token_id FROM PlayerRegistrations WHERE player_name = ?", (name,))
-    existing = cursor.fetchone()
+    with conn:
+        if name_indexed:
+            row = conn.execute(SQL_REGISTER, (name, int(time.time()))).fetchone()
+        else:
+            row = conn.execute(SQL_REGISTER_NO_INDEX, {"name": name, "ts": int(time.time())}).fetchone()
 
-    if existing:
-        print(f"Player '{name}' is already registered with RFID Token: {existing[0]}")
+    if row:
+        print(f"Registered '{name}' with RFID Token: {row[0]}")
     else:
-        rfid_token = str(get_next_rfid_token(cursor))
-
-        cursor.execute("""
-            INSERT INTO PlayerRegistrations (player_name, token_id, play_zone)
-            VALUES (?, ?)
-        """, (name, rfid_token))
-
-        conn.commit()
-        print(f"Registered '{name}' with RFID Token: {rfid_token}")
-
-    conn.close()
+        existing = conn.execute("SELECT token_id FROM PlayerRegistrations WHERE player_name = ?",
+                                (name,)).fetchone()
+        print(f"Player '{name}' is already registered with RFID Token: {existing[0]}")
 
 if __name__ == "__main__":
-    register_player()
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        register_player(conn, ensure_name_index(conn))
+    finally:
+        conn.close()
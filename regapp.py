@@ -1,4 +1,5 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, g
+import os
 import sqlite3
 import subprocess
 import re
@@ -6,17 +7,34 @@ import re
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+import get_id
+from db import ConnectionPool, ensure_schema, release
+
 app = Flask(__name__, static_folder='static', template_folder='templates')
 # MODIFIED: Using the full path you provided in your cronjob for consistency
 DB_PATH = '/home/devesh/Console/fly_camp_console/flycamp_framework.db'
-
-# MODIFIED: Added a helper function to get a DB connection to reduce repeated code.
-# This also lets us access columns by name, which is cleaner.
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+TZ_IST = ZoneInfo("Asia/Kolkata")  # loaded once, not per request
+SCAN_TIMEOUT = 10  # seconds to wait for a card
+_TOKEN_RE = re.compile(r'Token ID:\s*(\d+)')  # get_id.py's stdout line
+
+# One writer (register_player) + a few readers, reused across requests instead of
+# reconnecting each time. Rows still come back as sqlite3.Row (columns by name).
+_writer_pool = ConnectionPool(DB_PATH, 1)
+_reader_pool = ConnectionPool(DB_PATH, 8)
+
+def get_db_connection(write=False):
+    conn = (_writer_pool if write else _reader_pool).acquire()
+    g.setdefault('db_conns', []).append(conn)
     return conn
 
+@app.teardown_request
+def release_db(exc=None):
+    # Hand every connection borrowed during the request back to its pool
+    for conn in g.pop('db_conns', ()):
+        release(conn)
+
+ensure_schema(_writer_pool)
+
 @app.route('/')
 def reg_page():
     return render_template('reg.html')
@@ -41,7 +59,6 @@ def get_players():
         'SELECT token_id, player_name FROM PlayerRegistrations ORDER BY registration_timestamp'
     )
     pilots_from_db = cursor.fetchall()
-    conn.close()
     
     # --- CHANGE 2: Correct JSON Structure ---
     # Create a list of dictionaries with the keys 'token_id' and 'name'
@@ -62,7 +79,6 @@ def queue_count():
     cursor = conn.cursor()
     cursor.execute("SELECT COUNT(*) FROM PlayerRegistrations")
     count = cursor.fetchone()[0]
-    conn.close()
     return jsonify({'count': count})
 
 @app.route('/check_name', methods=['POST'])
@@ -74,7 +90,6 @@ def check_name():
     cursor = conn.cursor()
     cursor.execute("SELECT 1 FROM PlayerRegistrations WHERE player_name = ?", (name,))
     exists = cursor.fetchone() is not None
-    conn.close()
     return jsonify({'exists': exists})
 
 @app.route('/register', methods=['POST'])
@@ -88,7 +103,7 @@ def register_player():
     if not name or not token_id:
         return jsonify({'status': 'error', 'message': 'Missing name or token ID'}), 400
 
-    conn = get_db_connection()
+    conn = get_db_connection(write=True)
     cursor = conn.cursor()
 
     try:
@@ -111,7 +126,7 @@ def register_player():
         rfid_uid = token_row['rfid_uid']
 
         # All checks passed, proceed with registration in a transaction
-        kolkata_now_ts = int(datetime.now(tz=ZoneInfo("Asia/Kolkata")).timestamp())
+        kolkata_now_ts = int(datetime.now(tz=TZ_IST).timestamp())
 
         # Log the interaction
         cursor.execute(
@@ -131,25 +146,20 @@ def register_player():
     except sqlite3.Error as e:
         conn.rollback() # Undo changes if any error occurs
         return jsonify({'status': 'error', 'message': f'Database error: {e}'}), 500
-    finally:
-        conn.close()
 
 
-@app.route('/scan_uid', methods=['GET'])
-def scan_uid():
-    # This endpoint's logic does not need to change, as it relies on the output
-    # of the external 'get_id.py' script. As long as 'get_id.py' is updated
-    # to work with the new schema, this endpoint will function correctly.
+def scan_uid_subprocess():
+    # Fallback: run get_id.py as a script and parse its output.
     try:
         # It is recommended to use a timeout to prevent the request from hanging forever.
         result = subprocess.run(['python3', 'get_id.py'],
                                   stdout=subprocess.PIPE,
-                                  stderr=subprocess.PIPE,
-                                  timeout=10) # 10-second timeout
+                                  stderr=subprocess.DEVNULL,  # never read
+                                  timeout=SCAN_TIMEOUT)
         output = result.stdout.decode('utf-8')
 
         # This regex correctly looks for the integer Token ID.
-        match = re.search(r'Token ID: (\d+)', output)
+        match = _TOKEN_RE.search(output)
         if match:
             token_id = int(match.group(1))
             return jsonify({'status': 'success', 'token_id': token_id})
@@ -164,5 +174,29 @@ def scan_uid():
     except Exception as e:
         return jsonify({'status': 'error', 'message': f'An error occurred: {e}'}), 500
 
+@app.route('/scan_uid', methods=['GET'])
+def scan_uid():
+    # Read the token in-process via get_id.read_token(); the script is only
+    # launched if the module itself fails.
+    try:
+        token_id = get_id.read_token(timeout=SCAN_TIMEOUT)
+    except Exception as e:
+        print(f"[scan_uid] get_id.read_token failed ({e}), falling back to get_id.py")
+        return scan_uid_subprocess()
+
+    if token_id is None:
+        return jsonify({'status': 'timeout', 'message': 'No card scanned in time.'})
+    return jsonify({'status': 'success', 'token_id': token_id})
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # waitress with a small thread pool by default; DEV_SERVER=1 keeps the Flask dev server
+    if os.environ.get('DEV_SERVER') == '1':
+        app.run(host='0.0.0.0', port=5000, debug=True)
+    else:
+        try:
+            from waitress import serve
+        except ImportError:
+            print("waitress not installed, falling back to the Flask dev server")
+            app.run(host='0.0.0.0', port=5000, debug=True)
+        else:
+            serve(app, host='0.0.0.0', port=5000, threads=8)
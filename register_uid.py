@@ -1,76 +1,222 @@
-import sqlite3
+import os
+import re
+import selectors
+import sys
 import time
 
+from db import get_writer
+
 DB_NAME = 'flycamp_framework.db'
+DEBUG = os.environ.get("DEBUG") == "1"
+
+# The process's writer connection, fetched by init_db(). Autocommit
+# (isolation_level=None): single statements commit on their own and batches
+# open their own BEGIN IMMEDIATE ... COMMIT.
+_CONN = None
 
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute('''
+    global _CONN
+    _CONN = get_writer(DB_NAME)
+    _CONN.execute('''
         CREATE TABLE IF NOT EXISTS RFIDTokens (
             token_id INTEGER PRIMARY KEY AUTOINCREMENT,
             rfid_uid TEXT UNIQUE NOT NULL
         )
     ''')
-    conn.commit()
-    conn.close()
+    if DEBUG:
+        check_lookup_plan(_CONN)
+    return _CONN
 
-def register_uid(uid):
-    uid = uid.strip().upper()
-    if not uid:
-        print("[!] Empty UID. Try again.")
-        return
+def check_lookup_plan(conn):
+    # token_id is the rowid, so the UNIQUE(rfid_uid) autoindex already covers
+    # the UID -> token_id lookup; an extra (rfid_uid, token_id) index would only
+    # slow inserts. Make sure SQLite keeps answering it from the index alone.
+    plan = " ".join(row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT rfid_uid, token_id FROM RFIDTokens WHERE rfid_uid IN (?)", ("",)))
+    assert "USING COVERING INDEX" in plan, f"UID lookup is not index-only: {plan}"
+    print(f"[debug] UID lookup plan: {plan}")
 
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT token_id FROM RFIDTokens WHERE rfid_uid = ?", (uid,))
-    existing = cursor.fetchone()
-    if existing:
-        print(f"[!] UID {uid} is already registered with Token ID: {existing[0]}")
-    else:
-        cursor.execute("INSERT INTO RFIDTokens (rfid_uid) VALUES (?)", (uid,))
-        conn.commit()
-        token_id = cursor.lastrowid
+# Single-UID registration in one statement (RETURNING needs SQLite >= 3.35).
+# NOT EXISTS instead of ON CONFLICT: an upsert that hits the UNIQUE index still
+# burns an AUTOINCREMENT value, which would leave gaps in the token ids.
+SQL_REGISTER_UID = """
+    INSERT INTO RFIDTokens (rfid_uid)
+    SELECT :uid WHERE NOT EXISTS (SELECT 1 FROM RFIDTokens WHERE rfid_uid = :uid)
+    RETURNING token_id
+"""
+
+# A UID is 4-32 hex digits; spaces are allowed in input and dropped
+_UID_RE = re.compile(rb'[0-9A-F]{4,32}')
+
+def clean_uid(text):
+    """Normalised UID string, or None if `text` isn't a valid UID."""
+    # 'replace' turns non-ASCII into '?', which then fails the match
+    clean = text.encode('ascii', 'replace').translate(None, b' \t').upper()
+    return clean.decode('ascii') if _UID_RE.fullmatch(clean) else None
+
+_IN_CHUNK = 500  # UIDs per IN (...) lookup, well under SQLite's bound-parameter limit
+
+def _lookup_tokens(conn, uids):
+    found = {}
+    for i in range(0, len(uids), _IN_CHUNK):
+        chunk = uids[i:i + _IN_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        found.update(conn.execute(f"SELECT rfid_uid, token_id FROM RFIDTokens WHERE rfid_uid IN ({marks})", chunk))
+    return found
+
+def register_uids_bulk(conn, uids):
+    """Register many UIDs in ONE transaction. Returns (new, existing) dicts of uid -> token_id."""
+    uids = list(dict.fromkeys(u.strip().upper() for u in uids if u.strip()))
+    if not uids:
+        return {}, {}
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        existing = _lookup_tokens(conn, uids)
+        fresh = [u for u in uids if u not in existing]  # skipping known UIDs leaves no token_id gaps
+        # OR IGNORE: a duplicate never aborts the rest of the batch
+        conn.executemany("INSERT OR IGNORE INTO RFIDTokens (rfid_uid) VALUES (?)", [(u,) for u in fresh])
+        new = _lookup_tokens(conn, fresh)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return new, existing
+
+def report_registration(new, existing):
+    for uid, token_id in existing.items():
+        print(f"[!] UID {uid} is already registered with Token ID: {token_id}")
+    for uid, token_id in new.items():
         print(f"[+] UID {uid} registered with new Token ID: {token_id}")
-    conn.close()
+
+def register_uid(conn, uid):
+    clean = clean_uid(uid)
+    if clean is None:
+        print(f"[!] Invalid UID {uid.strip()!r}. Use 4-32 hex chars (e.g., 04A1).")
+        return
+    uid = clean
+    row = conn.execute(SQL_REGISTER_UID, {"uid": uid}).fetchone()  # autocommit
+    if row:
+        report_registration({uid: row[0]}, {})
+    else:
+        existing = conn.execute("SELECT token_id FROM RFIDTokens WHERE rfid_uid = ?", (uid,)).fetchone()
+        report_registration({}, {uid: existing[0]})
+
+# === Idle-aware input ===
+IDLE_INTERVAL = 1.0                      # seconds between idle checks while waiting for input
+WAL_CHECKPOINT_BYTES = 4 * 1024 * 1024   # truncate the WAL once it grows past this
+
+def checkpoint_if_large(conn):
+    try:
+        wal_size = os.path.getsize(DB_NAME + "-wal")
+    except OSError:
+        return
+    if wal_size > WAL_CHECKPOINT_BYTES:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+class LineReader:
+    """input() replacement that calls on_idle() every IDLE_INTERVAL s while stdin is quiet.
+    Falls back to plain input() where stdin can't be selected on (e.g. a Windows console)."""
+
+    def __init__(self, on_idle):
+        self.on_idle = on_idle
+        self.pending = b""  # bytes read past the last newline (pasted lines)
+        self.sel = None
+        if os.name == "nt":  # select() only accepts sockets there
+            return
+        self.sel = selectors.DefaultSelector()
+        try:
+            self.fd = sys.stdin.fileno()
+            self.sel.register(self.fd, selectors.EVENT_READ)
+        except (OSError, ValueError):
+            self.sel.close()
+            self.sel = None
+
+    def readline(self, prompt):
+        """One line without its newline, or None at end of input."""
+        print(prompt, end="", flush=True)
+        if self.sel is None:
+            try:
+                return input()
+            except EOFError:
+                return None
+
+        while b"\n" not in self.pending:
+            if not self.sel.select(IDLE_INTERVAL):
+                self.on_idle()
+                continue
+            chunk = os.read(self.fd, 4096)
+            if not chunk:
+                line, self.pending = self.pending, b""
+                return line.decode(errors="replace") if line else None
+            self.pending += chunk
+        line, _, self.pending = self.pending.partition(b"\n")
+        return line.decode(errors="replace")
+
+    def close(self):
+        if self.sel is not None:
+            self.sel.close()
 
 def main():
-    init_db()
+    conn = init_db()
+    try:
+        repl(conn)
+    finally:
+        conn.execute("PRAGMA optimize")
+        conn.close()
+
+def repl(conn):
     print("FlyCamp Framework - Manual RFID Registration (No Hardware)")
-    print("Enter UID in hex format (e.g., 04A1B2C3) or 'list' to view, 'quit' to exit.\n")
+    print("Enter UID in hex format (e.g., 04A1B2C3) or 'list' to view, 'quit' to exit.")
+    print("Several UIDs separated by commas are registered together.\n")
+
+    reader = LineReader(lambda: checkpoint_if_large(conn))
+    try:
+        repl_loop(conn, reader)
+    finally:
+        reader.close()
 
+def repl_loop(conn, reader):
     while True:
-        user_input = input("Enter UID > ").strip()
+        user_input = reader.readline("Enter UID > ")
+        if user_input is None:  # end of input behaves like 'quit'
+            print("\nGoodbye!")
+            break
+        user_input = user_input.strip()
 
         if user_input.lower() == 'quit':
             print("Goodbye!")
             break
         elif user_input.lower() == 'list':
-            show_tokens()
+            show_tokens(conn)
             continue
-        elif len(user_input.replace(" ", "")) < 4:
-            print("[!] UID too short. Minimum 4 chars (e.g., 04A1).")
+
+        # Clean input: remove spaces, make uppercase, hex only
+        parts = user_input.split(",")
+        clean_uids = [clean_uid(u) for u in parts]
+        bad = [u.strip() for u, c in zip(parts, clean_uids) if c is None]
+        if bad:
+            print(f"[!] Invalid UID(s): {', '.join(map(repr, bad))}. Use 4-32 hex chars (e.g., 04A1).")
             continue
 
-        # Clean input: remove spaces, make uppercase
-        clean_uid = user_input.replace(" ", "").upper()
-        print(f"\n[+] Simulating tag detection: {clean_uid}")
-        register_uid(clean_uid)
+        print(f"\n[+] Simulating tag detection: {', '.join(clean_uids)}")
+        if len(clean_uids) == 1:
+            register_uid(conn, clean_uids[0])
+        else:
+            report_registration(*register_uids_bulk(conn, clean_uids))
         print()
 
-def show_tokens():
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT rfid_uid, token_id FROM RFIDTokens ORDER BY token_id;")
-    rows = cursor.fetchall()
-    if not rows:
+def show_tokens(conn):
+    # Fixed-width columns, so rows print straight off the cursor
+    empty = True
+    for uid, token_id in conn.execute("SELECT rfid_uid, token_id FROM RFIDTokens ORDER BY token_id;"):
+        if empty:
+            print(f"\n{'UID':<20} | {'Token ID'}")
+            print("-" * 35)
+            empty = False
+        print(f"{uid:<20} | {token_id}")
+    if empty:
         print("No RFID tokens registered yet.")
-    else:
-        print(f"\n{'UID':<20} | {'Token ID'}")
-        print("-" * 35)
-        for uid, token_id in rows:
-            print(f"{uid:<20} | {token_id}")
-    conn.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
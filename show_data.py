@@ -1,17 +1,40 @@
-import sqlite3
+from db import get_reader
 
 # Connect to the database
 DB_NAME = 'flycamp_framework.db'
-conn = sqlite3.connect(DB_NAME)
+conn = get_reader(DB_NAME)
 cursor = conn.cursor()
 
+SQL_PLAYERS = "SELECT sl_no, name, rfid_token, play_zone FROM Players ORDER BY sl_no"
+SQL_OVERALL_STATS = "SELECT rfid_token, overall_play_count, overall_score FROM OverallStats"
+SQL_RFID_TOKENS = "SELECT token_id, uid FROM RFIDTokens ORDER BY token_id"
+SQL_GAME_SESSIONS = "SELECT session_id, rfid_token, game_number, level_number, timestamp FROM GameSessions ORDER BY session_id"
+SQL_PLAYER_STATS = "SELECT rfid_token, game_number, level_number, play_count, score_total FROM PlayerStats"
+SQL_SEQUENCE = "SELECT name, seq FROM sqlite_sequence"
+
+# (title, query, column headers), printed in this order
+REPORTS = (
+    ("Players", SQL_PLAYERS, ["sl_no", "name", "rfid_token", "play_zone"]),
+    ("OverallStats", SQL_OVERALL_STATS, ["rfid_token", "overall_play_count", "overall_score"]),
+    ("RFIDTokens", SQL_RFID_TOKENS, ["token_id", "uid"]),
+    ("GameSessions", SQL_GAME_SESSIONS, ["session_id", "rfid_token", "game_number", "level_number", "timestamp"]),
+    ("PlayerStats", SQL_PLAYER_STATS, ["rfid_token", "game_number", "level_number", "play_count", "score_total"]),
+    ("sqlite_sequence", SQL_SEQUENCE, ["name", "seq"]),  # optional
+)
+
 def print_rows(title, headers, rows):
     print(f"\n=== {title} ===")
     if not rows:
         print("No data.")
         return
 
-    col_widths = [max(len(str(item)) for item in col) for col in zip(*([headers] + rows))]
+    # Single pass over the rows, no transpose
+    col_widths = [len(str(h)) for h in headers]
+    for row in rows:
+        for i, item in enumerate(row):
+            w = len(str(item))
+            if w > col_widths[i]:
+                col_widths[i] = w
     fmt = " | ".join("{:<" + str(width) + "}" for width in col_widths)
 
     print(fmt.format(*headers))
@@ -20,29 +43,11 @@ def print_rows(title, headers, rows):
         print(fmt.format(*row))
 
 def show_table_data():
-    # 1. Players
-    cursor.execute("SELECT sl_no, name, rfid_token, play_zone FROM Players ORDER BY sl_no")
-    print_rows("Players", ["sl_no", "name", "rfid_token", "play_zone"], cursor.fetchall())
-
-    # 2. OverallStats
-    cursor.execute("SELECT rfid_token, overall_play_count, overall_score FROM OverallStats")
-    print_rows("OverallStats", ["rfid_token", "overall_play_count", "overall_score"], cursor.fetchall())
-
-    # 3. RFIDTokens
-    cursor.execute("SELECT token_id, uid FROM RFIDTokens ORDER BY token_id")
-    print_rows("RFIDTokens", ["token_id", "uid"], cursor.fetchall())
-
-    # 4. GameSessions
-    cursor.execute("SELECT session_id, rfid_token, game_number, level_number, timestamp FROM GameSessions ORDER BY session_id")
-    print_rows("GameSessions", ["session_id", "rfid_token", "game_number", "level_number", "timestamp"], cursor.fetchall())
-
-    # 5. PlayerStats
-    cursor.execute("SELECT rfid_token, game_number, level_number, play_count, score_total FROM PlayerStats")
-    print_rows("PlayerStats", ["rfid_token", "game_number", "level_number", "play_count", "score_total"], cursor.fetchall())
-
-    # 6. sqlite_sequence (optional)
-    cursor.execute("SELECT name, seq FROM sqlite_sequence")
-    print_rows("sqlite_sequence", ["name", "seq"], cursor.fetchall())
+    # One cursor and one loop for every report. Column widths depend on every
+    # row, so each table is still fetched whole before printing.
+    for title, sql, headers in REPORTS:
+        cursor.execute(sql)
+        print_rows(title, headers, cursor.fetchall())
 
 if __name__ == "__main__":
     show_table_data()
@@ -1,21 +1,23 @@
-import sqlite3
+from db import get_reader
 
 DB_NAME = 'flycamp_framework.db'
 
 def show_tokens():
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_reader(DB_NAME)
     cursor = conn.cursor()
 
     cursor.execute("SELECT rfid_uid, token_id FROM RFIDTokens ORDER BY token_id;")
-    rows = cursor.fetchall()
 
-    if not rows:
+    # Fixed-width columns, so rows print straight off the cursor
+    empty = True
+    for uid, token_id in cursor:
+        if empty:
+            print(f"{'UID':<20} | {'Token ID'}")
+            print("-" * 35)
+            empty = False
+        print(f"{uid:<20} | {token_id}")
+    if empty:
         print("No RFID tokens registered.")
-    else:
-        print(f"{'UID':<20} | {'Token ID'}")
-        print("-" * 35)
-        for uid, token_id in rows:
-            print(f"{uid:<20} | {token_id}")
 
     conn.close()
 
@@ -1,4 +1,7 @@
 import time
+import logging
+import queue
+import threading
 import tkinter as tk
 import paho.mqtt.client as mqtt
 import random
@@ -7,21 +10,29 @@ import random
 BROKER = "localhost"
 NODES = ["node1", "node2", "node3", "node4", "node5"]
 HIT_TOPICS = [f"game/hit/{nid}" for nid in NODES]
+TOPIC_TO_NODE = {f"game/hit/{nid}": nid for nid in NODES}
 TRIGGER_TOPICS = {nid: f"game/trigger/{nid}" for nid in NODES}
+TRIGGER_TOPIC_LIST = [TRIGGER_TOPICS[nid] for nid in NODES]
 RESET_TOPIC = "game/reset"
 COLOR_TOPIC = "game/color"
 GAME_DURATION = 60  # seconds
+TICK_MS = 250        # timer redraw interval...
+FINAL_TICK_MS = 100  # ...tightened for the last second
 SEQUENCE_LENGTH = 60  # set this to any number of colors you want in the sequence
 
+# Per-hit/per-round lines are DEBUG; at the default INFO level they cost one level check
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger("hues")
+
 # === GAME STATE ===
 hit_count = 0
-start_time = None
+end_deadline = None  # time.monotonic() at which the round ends; set by the first correct hit
 game_started = False
 timer_running = False
 current_color_index = 0
 color_sequence = []
-color_to_node = {}
 target_color = None
+expected_node = None  # node lit with target_color; set once per round in trigger_next_node()
 
 # === FIXED NODE COLORS (MATCH NODE FIRMWARE) ===
 NODE_COLORS = {
@@ -31,6 +42,8 @@ NODE_COLORS = {
     "node4": "yellow",
     "node5": "orange"
 }
+BASE_COLORS = tuple(NODE_COLORS.values())
+COLOR_TO_NODE = {color: node for node, color in NODE_COLORS.items()}
 
 # === GUI ===
 root = tk.Tk()
@@ -41,87 +54,127 @@ root.configure(bg="black")
 canvas = tk.Canvas(root, bg="black", highlightthickness=0)
 canvas.pack(fill="both", expand=True)
 
+# Screen geometry, measured once instead of an update_idletasks() round-trip per draw
+root.update_idletasks()
+_SCREEN_W = root.winfo_screenwidth()
+_SCREEN_H = root.winfo_screenheight()
+_CX, _CY = _SCREEN_W // 2, _SCREEN_H // 2
+
 power_button = None
 exit_button = None
 power_button_pressed = False
-hold_start_time = 0
+hold_after_id = None  # pending root.after() that quits after a 5 s hold
+HOLD_TO_EXIT_MS = 5000
+
+# Canvas items that change while playing; updated in place, recreated only by show_main_screen()
+ring_id = None  # static outer ring: drawn once, survives clear_screen()
+timer_arc_id = None
+score_text_id = None
+target_text_id = None
+RING_R = 160
 
 client = mqtt.Client("shieldworld_ui")
 
 # === UTILITIES ===
-def get_center():
-    root.update_idletasks()
-    w = root.winfo_screenwidth()
-    h = root.winfo_screenheight()
-    return w // 2, h // 2
+def on_root_configure(event):
+    # Only a real resize of the window itself invalidates the cached geometry;
+    # then every item is laid out again around the new centre.
+    global _SCREEN_W, _SCREEN_H, _CX, _CY
+    if event.widget is not root or (event.width, event.height) == (_SCREEN_W, _SCREEN_H):
+        return
+    _SCREEN_W, _SCREEN_H = event.width, event.height
+    _CX, _CY = _SCREEN_W // 2, _SCREEN_H // 2
+    if ring_id is not None:
+        canvas.coords(ring_id, *ring_bbox(_CX, _CY - 20, RING_R))
+    show_main_screen()  # the next timer tick restores the arc's extent
 
 def clear_screen():
-    canvas.delete("all")
+    global timer_arc_id, score_text_id, target_text_id
+    for item in canvas.find_all():
+        if item != ring_id:
+            canvas.delete(item)
+    timer_arc_id = score_text_id = target_text_id = None
+
+def ring_bbox(x, y, r):
+    return x - r, y - r, x + r, y + r
+
+def draw_timer_ring(x, y, r):
+    """Draw the static outer ring once; later calls are no-ops."""
+    global ring_id
+    if ring_id is None:
+        ring_id = canvas.create_oval(*ring_bbox(x, y, r), outline="deepskyblue", width=12, tags="timer")
 
 def draw_circle_progress(x, y, r, percent, color):
-    canvas.create_oval(x - r, y - r, x + r, y + r, outline="deepskyblue", width=12, tags="timer")
+    """Draw the progress arc over the ring; returns the arc id for later itemconfig()."""
+    draw_timer_ring(x, y, r)
     angle = percent * 360
-    canvas.create_arc(x - r, y - r, x + r, y + r, start=90, extent=-angle,
-                      style="arc", outline=color, width=20, tags="timer")
+    return canvas.create_arc(*ring_bbox(x, y, r), start=90, extent=-angle,
+                             style="arc", outline=color, width=20, tags="timer")
 
 def draw_text_center(x, y, text, size=48, color="red", weight="bold", tag=None):
-    canvas.create_text(x, y, text=text, fill=color, font=("Myriad Pro", size, weight), tags=tag)
+    return canvas.create_text(x, y, text=text, fill=color, font=("Myriad Pro", size, weight), tags=tag)
 
 def draw_target_color():
+    global target_text_id
     if not target_color:
         return
-    cx, cy = get_center()
-    canvas.delete("target_color")
-    draw_text_center(cx, cy + 200, f"TARGET: {target_color.upper()}", 48, target_color, tag="target_color")
+    text = f"TARGET: {target_color.upper()}"
+    if target_text_id is None:
+        target_text_id = draw_text_center(_CX, _CY + 200, text, 48, target_color, tag="target_color")
+    else:
+        canvas.itemconfig(target_text_id, text=text, fill=target_color)
 
 def generate_color_sequence():
-    global color_sequence, color_to_node
-    base_colors = list(NODE_COLORS.values())
-    color_sequence = [random.choice(base_colors) for _ in range(SEQUENCE_LENGTH)]
-    color_to_node = {color: node for node, color in NODE_COLORS.items()}
-    print("🎯 Color sequence:", color_sequence)
-    print("🎯 Color → Node:", color_to_node)
+    global color_sequence
+    color_sequence = random.choices(BASE_COLORS, k=SEQUENCE_LENGTH)
+    logger.debug("🎯 Color sequence: %s", color_sequence)
+    logger.debug("🎯 Color → Node: %s", COLOR_TO_NODE)
 
 def trigger_next_node():
-    global target_color
+    global target_color, expected_node
     if game_started and current_color_index < len(color_sequence):
         target_color = color_sequence[current_color_index]
+        expected_node = COLOR_TO_NODE.get(target_color)
         draw_target_color()
-        print(f"🚀 Triggering round {current_color_index + 1}: {target_color}")
-
-        client.publish(COLOR_TOPIC, target_color, retain=True)
-
-        for node_id in NODES:
-            client.publish(TRIGGER_TOPICS[node_id], "start")
+        logger.debug("🚀 Triggering round %d: %s", current_color_index + 1, target_color)
+        _publish_q.put(target_color)
+
+# === MQTT PUBLISHER ===
+# Single-publisher contract: round-start messages (colour + every node trigger) are
+# only ever sent by the _publisher thread, in queue order, so neither the Tk thread
+# nor the MQTT callback thread blocks on paho's publish lock.
+_publish_q = queue.Queue()
+
+def _publisher():
+    while True:
+        color = _publish_q.get()
+        client.publish(COLOR_TOPIC, color, qos=0, retain=False)
+        for topic in TRIGGER_TOPIC_LIST:
+            client.publish(topic, "start", qos=0)
 
 def update_main_screen():
-    global game_started, start_time
-    if not game_started or not timer_running or start_time is None:
+    if not game_started or not timer_running or end_deadline is None:
         return
 
-    elapsed = time.time() - start_time
-    percent = min(elapsed / GAME_DURATION, 1)
-    remaining = GAME_DURATION - elapsed
+    remaining = end_deadline - time.monotonic()
+    percent = min(1 - remaining / GAME_DURATION, 1)
 
-    canvas.delete("timer")
-    canvas.delete("score")
-    cx, cy = get_center()
-    draw_circle_progress(cx, cy - 20, 160, percent, "green")
-    draw_text_center(cx, cy - 20, str(hit_count), 72, "white", tag="score")
-    draw_target_color()
+    canvas.itemconfig(timer_arc_id, extent=-percent * 360)
+    canvas.itemconfig(score_text_id, text=str(hit_count))
 
     if remaining <= 0:
         end_game()
+    elif remaining > 1.0:
+        root.after(TICK_MS, update_main_screen)
     else:
-        root.after(100, update_main_screen)
+        root.after(min(FINAL_TICK_MS, int(remaining * 1000) + 1), update_main_screen)
 
 def show_main_screen():
-    global power_button, exit_button
+    global power_button, exit_button, timer_arc_id, score_text_id
     clear_screen()
-    cx, cy = get_center()
-    draw_text_center(cx, cy - 260, "Hues Detected", 54, "white", tag="title")
-    draw_circle_progress(cx, cy - 20, 160, 0, "white")
-    draw_text_center(cx, cy - 20, str(hit_count), 72, "white", tag="score")
+    draw_text_center(_CX, _CY - 260, "Hues Detected", 54, "white", tag="title")
+    timer_arc_id = draw_circle_progress(_CX, _CY - 20, RING_R, 0, "green")  # colour fixed; ticks set extent only
+    score_text_id = draw_text_center(_CX, _CY - 20, str(hit_count), 72, "white", tag="score")
     draw_target_color()
 
     if not game_started:
@@ -130,16 +183,16 @@ def show_main_screen():
                                  activebackground="green", relief="flat", width=10, height=1)
         power_button.bind("<ButtonPress>", lambda e: on_button_press())
         power_button.bind("<ButtonRelease>", lambda e: on_button_release())
-        canvas.create_window(100, root.winfo_screenheight() - 60, window=power_button, anchor="sw")
+        canvas.create_window(100, _SCREEN_H - 60, window=power_button, anchor="sw")
 
     exit_button = tk.Button(root, text="X", font=("Arial", 20, "bold"),
                             fg="white", bg="red", command=root.destroy)
-    canvas.create_window(root.winfo_screenwidth() - 30, 30, window=exit_button, anchor="ne")
+    canvas.create_window(_SCREEN_W - 30, 30, window=exit_button, anchor="ne")
 
 def start_game():
-    global hit_count, start_time, game_started, timer_running, current_color_index
+    global hit_count, end_deadline, game_started, timer_running, current_color_index
     hit_count = 0
-    start_time = None
+    end_deadline = None
     timer_running = False
     game_started = True
     current_color_index = 0
@@ -154,63 +207,73 @@ def end_game():
     show_main_screen()
 
 def on_button_press():
-    global power_button_pressed, hold_start_time
+    global power_button_pressed, hold_after_id
     power_button_pressed = True
-    hold_start_time = time.time()
-    check_hold()
+    hold_after_id = root.after(HOLD_TO_EXIT_MS, exit_if_still_held)
 
 def on_button_release():
-    global power_button_pressed
+    global power_button_pressed, hold_after_id
     power_button_pressed = False
+    if hold_after_id is not None:
+        root.after_cancel(hold_after_id)
+        hold_after_id = None
     if not game_started:
         start_game()
 
-def check_hold():
+def exit_if_still_held():
+    global hold_after_id
+    hold_after_id = None
     if power_button_pressed:
-        if time.time() - hold_start_time > 5:
-            root.destroy()
-        else:
-            root.after(100, check_hold)
+        root.destroy()
 
 # === MQTT CALLBACKS ===
 def on_connect(client, userdata, flags, rc):
     for topic in HIT_TOPICS:
-        print(f"🔔 Subscribed to {topic}")
+        logger.info("🔔 Subscribed to %s", topic)
         client.subscribe(topic)
 
 def on_message(client, userdata, msg):
-    global hit_count, start_time, timer_running, current_color_index, target_color
+    global hit_count, end_deadline, timer_running, current_color_index, target_color
     if not game_started:
         return
+    node = TOPIC_TO_NODE.get(msg.topic)
+    if node is None:
+        return
 
-    node = msg.topic.split("/")[-1].lower()
-    payload = msg.payload.decode().strip().lower()
-    print("📩 MQTT HIT:", node, payload)
-
-    expected_node = color_to_node.get(target_color, "").lower()
-    print("🔍 Expected:", expected_node, "| Got:", node)
-
-    if payload == "hit" and node == expected_node:
-        print("✅ Correct hit!")
+    payload = msg.payload
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("📩 MQTT HIT: %s %r", node, payload)
+        logger.debug("🔍 Expected: %s | Got: %s", expected_node, node)
+
+    # Bytes compare; only odd payloads pay for strip/lower
+    is_hit = payload == b"hit" or payload.strip().lower() == b"hit"
+    if is_hit and node == expected_node:
+        if debug:
+            logger.debug("✅ Correct hit!")
         if hit_count == 0 and not timer_running:
-            start_time = time.time()
+            end_deadline = time.monotonic() + GAME_DURATION
             timer_running = True
             update_main_screen()
         hit_count += 1
         current_color_index += 1
         trigger_next_node() if current_color_index < len(color_sequence) else end_game()
-    else:
-        print("❌ Wrong hit or no match.")
+    elif debug:
+        logger.debug("❌ Wrong hit or no match.")
 
 # === MQTT INIT ===
 def setup_mqtt():
     client.on_connect = on_connect
     client.on_message = on_message
+    client.max_inflight_messages_set(len(NODES) * 2)  # one round = colour + a trigger per node
     client.connect(BROKER, 1883, 60)
     client.loop_start()
     client.publish(RESET_TOPIC, "reset")
+    client.publish(COLOR_TOPIC, b"", retain=True)  # clear the colour older builds left retained
+    threading.Thread(target=_publisher, daemon=True).start()
 
 # === MAIN ===
+root.bind("<Configure>", on_root_configure)
 setup_mqtt()
 show_main_screen()
 root.mainloop()